@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import time
+
+from jiwer import process_characters, process_words
+
+from src.asr import create_asr
+from src.audio import SharedAudio
+from src.eval.asr import ASREvaluator
+from src.model_registry import unload
+
+
+def parse_backend(spec: str, device: str, beam_size: int, threads: int) -> dict:
+    """"engine:model_size[:compute_type]", e.g. "whisper:small" or "faster-whisper:small:int8"."""
+    engine, _, rest = spec.partition(":")
+    model_size, _, compute_type = rest.partition(":")
+    options = {"model_size": model_size or "small", "device": device}
+    if engine == "faster-whisper":
+        options.update(compute_type=compute_type or "int8", beam_size=beam_size, cpu_threads=threads)
+    return {"engine": engine, **options}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare real-time factor and WER of ASR backends.")
+    parser.add_argument("audio_path", nargs="?", default="data/audio/ES2016a.Mix-Headset.wav")
+    parser.add_argument("--backends", nargs="+", default=["whisper:small", "faster-whisper:small:int8"],
+                        help="engine:model_size[:compute_type]")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads for faster-whisper (0 = automatic)")
+    parser.add_argument("--words-dir", default="data/words")
+    parser.add_argument("--meeting-id", default=None, help="Defaults to the AMI id in the audio file name")
+    parser.add_argument("--report", default="outputs/asr_benchmark.json")
+    args = parser.parse_args()
+
+    meeting_id = args.meeting_id or os.path.basename(args.audio_path).split(".")[0]
+    reference = ASREvaluator(args.words_dir, hyp_path=None, meeting_id=meeting_id).load_reference_text()
+
+    # Decoded once up front, so decode time is not charged to any backend.
+    audio = SharedAudio(args.audio_path)
+    duration = audio.duration
+
+    results = []
+    for spec in args.backends:
+        options = parse_backend(spec, args.device, args.beam_size, args.threads)
+        print(f"[Benchmark] {spec}: {options}")
+        engine = create_asr(**options)
+
+        started = time.perf_counter()
+        engine.model
+        load_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        result = engine.transcribe(audio)
+        seconds = time.perf_counter() - started
+        cpu_seconds = time.process_time() - cpu_started
+        unload(engine.model_key)
+
+        hypothesis = result["text"].lower()
+        entry = {
+            "backend": spec,
+            **engine.config,
+            "load_seconds": load_seconds,
+            "transcribe_seconds": seconds,
+            "cpu_seconds": cpu_seconds,
+            "rtf": seconds / duration,
+            "wer": process_words(reference, hypothesis).wer,
+            "cer": process_characters(reference, hypothesis).cer,
+        }
+        results.append(entry)
+        print(f"[Benchmark] {spec}: RTF {entry['rtf']:.3f}, WER {entry['wer']:.3f}, CER {entry['cer']:.3f}")
+
+    print(f"\n{'backend':<32} {'RTF':>7} {'WER':>7} {'CER':>7} {'load s':>8}")
+    for entry in results:
+        print(f"{entry['backend']:<32} {entry['rtf']:>7.3f} {entry['wer']:>7.3f} {entry['cer']:>7.3f} "
+              f"{entry['load_seconds']:>8.1f}")
+
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"audio_path": args.audio_path, "audio_seconds": duration, "results": results}, f, indent=2)
+    print(f"[Benchmark] Report written to {args.report}")
@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import random
+import time
+
+from src.speaker_attribution import attribute_speakers
+
+
+def synthetic_timeline(num_turns: int, num_speakers: int = 4, seed: int = 0):
+    """Diarization turns with some overlapping speech, and Whisper-like segments with pauses over the same span.
+
+    Some segments are zero-length and sit exactly on a turn start, which attribution must still resolve.
+    """
+    rng = random.Random(seed)
+    turns, t = [], 0.0
+    for _ in range(num_turns):
+        start = max(0.0, t - rng.uniform(0.0, 0.5)) if rng.random() < 0.1 else t + rng.uniform(0.0, 0.3)
+        end = start + rng.uniform(0.3, 6.0)
+        turns.append((round(start, 2), round(end, 2), f"SPEAKER_{rng.randrange(num_speakers):02d}"))
+        t = end
+    segments, t = [], 0.0
+    while t < turns[-1][1]:
+        if rng.random() < 0.01:
+            start = rng.choice(turns)[0]
+            segments.append({"start": start, "end": start})
+        end = t + rng.uniform(0.5, 8.0)
+        segments.append({"start": round(t, 2), "end": round(end, 2)})
+        t = end + (rng.uniform(0.0, 3.0) if rng.random() < 0.3 else 0.0)
+    segments.sort(key=lambda s: s["start"])
+    return turns, segments
+
+
+def brute_force(segments, turns, unknown: str = "unknown"):
+    """What attribute_speakers computes: maximum overlap, earliest turn on ties, containment at zero length."""
+    order = sorted(range(len(turns)), key=lambda i: turns[i][0])
+    speakers = []
+    for segment in segments:
+        start, end = segment["start"], segment["end"]
+        best = None
+        for rank, i in enumerate(order):
+            turn_start, turn_end, _ = turns[i]
+            overlap = min(end, turn_end) - max(start, turn_start)
+            if overlap > 0 or (start == end and turn_start <= start < turn_end):
+                if best is None or (overlap, -rank) > best[0]:
+                    best = ((overlap, -rank), turns[i][2])
+        speakers.append(best[1] if best else unknown)
+    return speakers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time speaker attribution on synthetic diarization timelines.")
+    parser.add_argument("--turns", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--check-turns", type=int, default=2_000,
+                        help="Size of the timeline compared against the brute-force definition (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", default="outputs/attribution_benchmark.json")
+    args = parser.parse_args()
+
+    if args.check_turns:
+        turns, segments = synthetic_timeline(args.check_turns, seed=args.seed)
+        # A zero-length segment on the start of a turn that no earlier segment reached.
+        turns.append((turns[-1][1] + 10.0, turns[-1][1] + 12.3, "SPEAKER_09"))
+        segments.append({"start": turns[-1][0], "end": turns[-1][0]})
+        expected = brute_force(segments, turns)
+        actual = [s["speaker"] for s in attribute_speakers(segments, turns)]
+        mismatches = sum(a != e for a, e in zip(actual, expected))
+        print(f"[Benchmark] Check on {len(turns)} turns / {len(segments)} segments: {mismatches} mismatches")
+        if mismatches:
+            raise SystemExit(1)
+
+    results = []
+    for num_turns in args.turns:
+        turns, segments = synthetic_timeline(num_turns, seed=args.seed)
+        started = time.perf_counter()
+        attribute_speakers(segments, turns)
+        seconds = time.perf_counter() - started
+        unknown = sum(s["speaker"] == "unknown" for s in segments)
+        results.append({"turns": len(turns), "segments": len(segments), "seconds": seconds, "unknown": unknown})
+        print(f"[Benchmark] {len(turns)} turns, {len(segments)} segments: {seconds:.3f}s ({unknown} unknown)")
+
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"seed": args.seed, "results": results}, f, indent=2)
+    print(f"[Benchmark] Report written to {args.report}")
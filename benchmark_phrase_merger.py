@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+from src.phrase_merger import PhraseMerger
+
+
+def reference_merge_segments(segments: List[Dict]) -> List[Dict]:
+    """The original quadratic merge_segments, kept as the definition the streaming merger must match."""
+    if not segments:
+        return []
+
+    merged = []
+    first = segments[0]
+    current = {
+        "id": 0,
+        "start": first["start"],
+        "end": first["end"],
+        "text": PhraseMerger.clean_text(first["text"]),
+        "speaker": first.get("speaker", "unknown"),
+        "segment_ids": [first.get("id", 0)]
+    }
+    phrase_id = 1
+
+    for seg in segments[1:]:
+        cleaned_text = PhraseMerger.clean_text(seg["text"])
+        seg_with_clean_text = {**seg, "text": cleaned_text}
+
+        if PhraseMerger.should_merge(current, seg_with_clean_text):
+            current["end"] = seg["end"]
+            current["text"] = PhraseMerger.clean_text(current["text"] + " " + cleaned_text)
+            current["segment_ids"].append(seg.get("id", -1))
+        else:
+            merged.append(current)
+            current = {
+                "id": phrase_id,
+                "start": seg["start"],
+                "end": seg["end"],
+                "text": cleaned_text,
+                "speaker": seg.get("speaker", "unknown"),
+                "segment_ids": [seg.get("id", -1)]
+            }
+            phrase_id += 1
+
+    merged.append(current)
+    return merged
+
+
+WORDS = ["so", "the", "remote", "control", "uh", "we", "should", "maybe", "design", "it", "yeah", "okay"]
+
+
+def synthetic_segments(n: int, num_speakers: int = 3, seed: int = 0, sentence_end: float = 0.3) -> List[Dict]:
+    """Whisper-like segments, with the edge cases the merger has to preserve.
+
+    Texts may be empty, whitespace-only or padded, speakers may be "unknown" and ids may be missing.
+    `sentence_end` sets how often a segment closes its sentence (low values give long monologues).
+    """
+    rng = random.Random(seed)
+    segments, t = [], 0.0
+    for i in range(n):
+        words = rng.choices(WORDS, k=rng.randrange(0, 12))
+        text = " ".join(words)
+        if words and rng.random() < sentence_end:
+            text += rng.choice(".!?")
+        if rng.random() < 0.2:
+            text = rng.choice(["  ", "\t", " \n "]) + text + rng.choice(["", "  ", "\n"])
+        segment = {"start": round(t, 2), "end": round(t + rng.uniform(0.5, 6.0), 2), "text": text}
+        if rng.random() < 0.9:
+            segment["id"] = i
+        segment["speaker"] = ("unknown" if rng.random() < 0.05
+                              else f"SPEAKER_{rng.randrange(num_speakers):02d}")
+        segments.append(segment)
+        t = segment["end"]
+    return segments
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and time PhraseMerger against the original merge.")
+    parser.add_argument("--segments", type=int, nargs="+", default=[10_000, 100_000, 200_000])
+    parser.add_argument("--check-lists", type=int, default=2_000,
+                        help="Random segment lists compared against the original merge (0 to skip)")
+    parser.add_argument("--reference-max", type=int, default=100_000,
+                        help="Largest size also timed with the original merge, which is quadratic in monologue length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", default="outputs/phrase_merger_benchmark.json")
+    args = parser.parse_args()
+
+    mismatches = 0
+    for i in range(args.check_lists):
+        rng = random.Random(args.seed + i)
+        segments = synthetic_segments(rng.randrange(0, 60), num_speakers=rng.randrange(1, 4), seed=args.seed + i,
+                                      sentence_end=rng.choice([0.0, 0.1, 0.5, 0.9]))
+        mismatches += PhraseMerger.merge_segments(segments) != reference_merge_segments(segments)
+    if args.check_lists:
+        print(f"[Benchmark] Check on {args.check_lists} random segment lists: {mismatches} mismatches")
+        if mismatches:
+            raise SystemExit(1)
+
+    results = []
+    for n in args.segments:
+        # Few sentence ends, so utterances grow long and the original's re-cleaning shows.
+        segments = synthetic_segments(n, num_speakers=1, seed=args.seed, sentence_end=0.01)
+        started = time.perf_counter()
+        merged = PhraseMerger.merge_segments(segments)
+        entry = {"segments": n, "utterances": len(merged), "seconds": time.perf_counter() - started}
+        if n <= args.reference_max:
+            started = time.perf_counter()
+            expected = reference_merge_segments(segments)
+            entry["reference_seconds"] = time.perf_counter() - started
+            entry["equal"] = merged == expected
+        results.append(entry)
+        reference = (f", original {entry['reference_seconds']:.3f}s, equal: {entry['equal']}"
+                     if "reference_seconds" in entry else "")
+        print(f"[Benchmark] {n} segments -> {entry['utterances']} utterances: {entry['seconds']:.3f}s{reference}")
+
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"seed": args.seed, "results": results}, f, indent=2)
+    print(f"[Benchmark] Report written to {args.report}")
+    if not all(entry.get("equal", True) for entry in results):
+        raise SystemExit(1)
@@ -0,0 +1,130 @@
+import argparse
+import json
+import math
+import os
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from src.eval.topic_segmentation import coverage, get_boundaries_binary, pk, window_diff
+
+
+# The original loop implementations, kept as the definitions the vectorized metrics must match.
+
+def reference_boundaries(timeline: List[float], segments: List[Dict], tolerance: float = 0.25) -> List[int]:
+    boundaries = [0] * len(timeline)
+    for seg in segments:
+        end_time = seg["end"]
+        for i, t in enumerate(timeline):
+            if abs(t - end_time) < tolerance:
+                boundaries[i] = 1
+                break
+    return boundaries
+
+
+def reference_pk(true: List[int], pred: List[int], k: int) -> float:
+    errors = 0
+    total = len(true) - k
+    for i in range(total):
+        ref_same = sum(true[i:i + k]) == 0
+        hyp_same = sum(pred[i:i + k]) == 0
+        if ref_same != hyp_same:
+            errors += 1
+    return errors / total
+
+
+def reference_window_diff(true: List[int], pred: List[int], k: int) -> float:
+    errors = 0
+    total = len(true) - k
+    for i in range(total):
+        if abs(sum(true[i:i + k]) - sum(pred[i:i + k])) > 0:
+            errors += 1
+    return errors / total
+
+
+def reference_coverage(true: List[int], pred: List[int], k: int) -> float:
+    return sum([any(pred[i:i + k]) for i in range(0, len(true) - k)]) / (len(true) - k)
+
+
+def random_segments(rng: random.Random, max_time: float, count: int) -> List[Dict]:
+    ends = sorted(rng.uniform(0.0, max_time * 1.05) for _ in range(count))
+    return [{"start": 0.0, "end": round(end, rng.choice([1, 2, 3]))} for end in ends]
+
+
+def check(cases: int, seed: int) -> int:
+    """Compare every metric with its reference on random timelines; returns the number of mismatches."""
+    mismatches = 0
+    for case in range(cases):
+        rng = random.Random(seed + case)
+        resolution = rng.choice([0.25, 0.5, 1.0])
+        max_time = rng.uniform(5.0, 600.0)
+        timeline = np.arange(0, max_time, resolution)
+        tolerance = resolution / 2
+        ref_segments = random_segments(rng, max_time, rng.randrange(0, 20))
+        hyp_segments = random_segments(rng, max_time, rng.randrange(0, 20))
+
+        ref_bounds = get_boundaries_binary(timeline, ref_segments, tolerance)
+        hyp_bounds = get_boundaries_binary(timeline, hyp_segments, tolerance)
+        if (list(ref_bounds) != reference_boundaries(list(timeline), ref_segments, tolerance)
+                or list(hyp_bounds) != reference_boundaries(list(timeline), hyp_segments, tolerance)):
+            mismatches += 1
+            continue
+        k = rng.randrange(1, max(2, len(timeline)))
+        true, pred = list(ref_bounds), list(hyp_bounds)
+        for fast, slow in ((pk, reference_pk), (window_diff, reference_window_diff), (coverage, reference_coverage)):
+            if not math.isclose(fast(ref_bounds, hyp_bounds, k), slow(true, pred, k), rel_tol=1e-12, abs_tol=1e-12):
+                mismatches += 1
+                break
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and time the topic segmentation metrics.")
+    parser.add_argument("--check-cases", type=int, default=500,
+                        help="Random timelines compared against the original loop implementations (0 to skip)")
+    parser.add_argument("--hours", type=float, default=2.0, help="Length of the timed timeline")
+    parser.add_argument("--resolution", type=float, default=0.5)
+    parser.add_argument("--k", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", default="outputs/topic_metrics_benchmark.json")
+    args = parser.parse_args()
+
+    if args.check_cases:
+        mismatches = check(args.check_cases, args.seed)
+        print(f"[Benchmark] Check on {args.check_cases} random timelines: {mismatches} mismatches")
+        if mismatches:
+            raise SystemExit(1)
+
+    rng = random.Random(args.seed)
+    max_time = args.hours * 3600
+    timeline = np.arange(0, max_time, args.resolution)
+    tolerance = args.resolution / 2
+    ref_segments = random_segments(rng, max_time, 40)
+    hyp_segments = random_segments(rng, max_time, 40)
+
+    started = time.perf_counter()
+    ref_bounds = get_boundaries_binary(timeline, ref_segments, tolerance)
+    hyp_bounds = get_boundaries_binary(timeline, hyp_segments, tolerance)
+    scores = [f(ref_bounds, hyp_bounds, args.k) for f in (pk, window_diff, coverage)]
+    seconds = time.perf_counter() - started
+
+    true, pred, points = list(ref_bounds), list(hyp_bounds), list(timeline)
+    started = time.perf_counter()
+    reference_boundaries(points, ref_segments, tolerance)
+    reference_boundaries(points, hyp_segments, tolerance)
+    reference_scores = [f(true, pred, args.k) for f in (reference_pk, reference_window_diff, reference_coverage)]
+    reference_seconds = time.perf_counter() - started
+
+    equal = all(math.isclose(a, b, rel_tol=1e-12, abs_tol=1e-12) for a, b in zip(scores, reference_scores))
+    print(f"[Benchmark] {len(timeline)} points, k={args.k}: {seconds * 1000:.1f} ms, "
+          f"original {reference_seconds * 1000:.1f} ms, equal: {equal}")
+
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"points": len(timeline), "k": args.k, "seconds": seconds, "reference_seconds": reference_seconds,
+                   "equal": equal}, f, indent=2)
+    print(f"[Benchmark] Report written to {args.report}")
+    if not equal:
+        raise SystemExit(1)
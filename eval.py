@@ -1,56 +1,36 @@
-from src.eval.asr import ASREvaluator
-from src.eval.diarization import DiarizationEvaluator
-from src.eval.topic_segmentation import TopicSegmentationEvaluator
-from src.eval.summary import SummaryEvaluator
+import argparse
+import os
 
-if __name__ == "__main__":
-    ref_dir = "data/words/"
-    hyp_path = "outputs/asr_output.json"
-
-    # ASR
-    asr_eval = ASREvaluator(ref_dir, hyp_path)
-    asr_eval.evaluate()
-
-    # DIARIZATION
-    diar_eval = DiarizationEvaluator(ref_dir, hyp_path)
-    diar_eval.evaluate()
-
-    # TOPIC SEGMENTATION
-    ref_topic_path = "data/topics/ES2016a.topic.xml"
-    topic_map_path= "data/topics/topic_map.json"
-    utterances_path = "outputs/utterances.json"
-    hyp_phases_path = "outputs/phases.json"
-    words_path = "data/words"
+from src.eval.runner import TASKS, CorpusEvaluator
 
-    topic_eval = TopicSegmentationEvaluator(
-        ref_topic_path=ref_topic_path,
-        topic_map_path=topic_map_path,
-        hyp_phrases_path=utterances_path,
-        hyp_phases_path=hyp_phases_path,
-        words_dir=words_path
-    )
-    topic_eval.evaluate()
 
-    # SUMMARY
-    gt_summary_path = "data/sum/ES2016asumm.txt"
-    summary_path = "outputs/summary.txt"
+def read_meeting_ids(values):
+    """Meeting ids given directly, or read from files listing one id per line."""
+    ids = []
+    for value in values:
+        if os.path.isfile(value):
+            with open(value, "r", encoding="utf-8") as f:
+                ids.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+        else:
+            ids.append(value)
+    return ids
 
-    sum_eval = SummaryEvaluator(pred_path=summary_path, ref_path=gt_summary_path)
-    sum_eval.evaluate()
-
-    from src.eval.intent import IntentEvaluator
-
-    # INTENT DETECTION
-    ref_da_files = "data/dialogue_acts"
-    intents_dict_path = "data/intents/intents_dict.json"
-    intents_path = "outputs/intents.json"
-
-    intent_eval = IntentEvaluator(
-        words_dir=words_path,
-        dialog_act_dir=ref_da_files,
-        intents_path=intents_path,
-        intents_dict_path=intents_dict_path,
-        hyp_utterances_path=utterances_path,
-    )
-    intent_eval.evaluate()
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate pipeline outputs against AMI references.")
+    parser.add_argument("meetings", nargs="*", default=["ES2016a"],
+                        help="Meeting ids, or files with one meeting id per line")
+    parser.add_argument("--ref-root", default="data", help="AMI references (words/, dialogue_acts/, topics/, sum/, intents/)")
+    parser.add_argument("--hyp-root", default="outputs",
+                        help="Pipeline outputs, one <meeting_id>/ directory per meeting "
+                             "(a single meeting may also be read from the directory itself)")
+    parser.add_argument("--tasks", nargs="+", default=list(TASKS), choices=TASKS)
+    parser.add_argument("--workers", type=int, default=1, help="Meetings evaluated in parallel processes")
+    parser.add_argument("--summary-batch-size", type=int, default=16, help="Summary pairs per BERTScore batch")
+    parser.add_argument("--report", default=None, help="Write the JSON report here")
+    parser.add_argument("--csv", default=None, help="Write per-meeting and aggregate metrics as CSV here")
+    args = parser.parse_args()
+
+    evaluator = CorpusEvaluator(args.ref_root, args.hyp_root, tasks=args.tasks, workers=args.workers,
+                                summary_batch_size=args.summary_batch_size)
+    evaluator.evaluate(read_meeting_ids(args.meetings), report_path=args.report, csv_path=args.csv)
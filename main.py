@@ -1,14 +1,69 @@
+import argparse
 import os
 from src.pipeline import Pipeline
+from src.service import PipelineService, serve
+
+STAGES = ["asr", "diarization", "attribution", "utterances", "phases", "summary", "intents", "speaker_info",
+          "final_output", "all"]
 
 if __name__ == "__main__":
-    audio_path = "data/audio/ES2016a.Mix-Headset.wav"
+    parser = argparse.ArgumentParser()
+    parser.add_argument("audio_path", nargs="?", default="data/audio/ES2016a.Mix-Headset.wav")
+    parser.add_argument("--batch", metavar="DIR_OR_MANIFEST",
+                        help="Process every recording in a directory or manifest into <save-path>/<meeting_id>/.")
+    parser.add_argument("--save-path", default="outputs")
+    parser.add_argument("--max-meetings", type=int, default=2,
+                        help="Meetings processed concurrently in batch and service mode.")
+    parser.add_argument("--force", action="append", default=[], choices=STAGES, metavar="STAGE",
+                        help="Re-run a stage even if its checkpoint is up to date (repeatable, or 'all').")
+    parser.add_argument("--output-format", choices=["json", "ndjson"], default="json",
+                        help="ndjson writes final_output.ndjson (a header line, then one utterance per line) "
+                             "and unindented intermediate files.")
+    parser.add_argument("--serve", action="store_true",
+                        help="Keep the models loaded and process jobs submitted over HTTP (see src/service.py).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-queue", type=int, default=16, help="Jobs allowed to wait before submissions get 503.")
+    parser.add_argument("--asr-engine", choices=["whisper", "faster-whisper"], default="whisper")
+    parser.add_argument("--model-size", default="small")
+    parser.add_argument("--device", default=None, help="Defaults to cpu with faster-whisper, cuda otherwise.")
+    parser.add_argument("--compute-type", default="int8", help="faster-whisper weight type (int8, float16, ...).")
+    parser.add_argument("--beam-size", type=int, default=5, help="faster-whisper beam size.")
+    parser.add_argument("--asr-threads", type=int, default=0, help="faster-whisper CPU threads (0 = automatic).")
+    parser.add_argument("--num-speakers", type=int, default=None,
+                        help="Fix the number of speakers; cached speaker embeddings are re-clustered.")
+    parser.add_argument("--vad", choices=["energy", "diarization"], default=None,
+                        help="Transcribe only speech regions, found by an energy-based pre-pass or taken "
+                             "from the diarization.")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the final output.")
+    args = parser.parse_args()
 
-    save_path = "outputs"
+    save_path = args.save_path
     os.makedirs(save_path, exist_ok=True)
 
+    asr_options = {}
+    if args.asr_engine == "faster-whisper":
+        asr_options = {"compute_type": args.compute_type, "beam_size": args.beam_size, "cpu_threads": args.asr_threads}
+
     pipeline = Pipeline(hf_token="",
                         openai_api_key="",
-                        save_path=save_path)
-    _ = pipeline.run(audio_path)
+                        model_size=args.model_size,
+                        device=args.device,
+                        asr_engine=args.asr_engine,
+                        asr_options=asr_options,
+                        save_path=save_path,
+                        llm_cache_path=".cache/llm_responses.sqlite",
+                        diarization_cache_dir=".cache/diarization",
+                        num_speakers=args.num_speakers,
+                        output_format=args.output_format,
+                        gzip_output=args.gzip,
+                        vad=args.vad)
+    if args.serve:
+        service = PipelineService(pipeline, output_root=os.path.join(save_path, "jobs"), max_queue=args.max_queue,
+                                  workers=args.max_meetings)
+        serve(service, host=args.host, port=args.port)
+    elif args.batch:
+        pipeline.run_many(args.batch, output_root=save_path, max_meetings=args.max_meetings, force=args.force)
+    else:
+        _ = pipeline.run(args.audio_path, force=args.force)
 
@@ -1,9 +1,198 @@
-import whisper
+from abc import ABC, abstractmethod
+from typing import Iterator, List, Union
+
+from src.audio import SAMPLE_RATE, SharedAudio, load_audio_window
+from src.model_registry import get_model, model_lock
+from src.vad import Region, SpeechMap
+
+
+class ASREngine(ABC):
+    """Speech recognition backend. Engines return Whisper's result shape, {"text", "segments", ...},
+    with segments carrying at least "id", "start", "end" and "text".
+
+    Subclasses provide `model_key`, `_load_model` and `_transcribe(model, source, **options)`,
+    where `source` is a file path or 16 kHz mono float32 samples; region and streaming
+    transcription are built on top of that.
+    """
+
+    name = None
+
+    @property
+    @abstractmethod
+    def model_key(self) -> tuple:
+        """Registry key of the loaded model; engines with equal keys share one instance."""
+
+    @property
+    @abstractmethod
+    def config(self) -> dict:
+        """Everything that changes the transcript, for checkpoint keys and benchmark reports."""
+
+    @property
+    def model(self):
+        return get_model(self.model_key, self._load_model)
+
+    @abstractmethod
+    def _load_model(self):
+        ...
+
+    @abstractmethod
+    def _transcribe(self, model, source, **options) -> dict:
+        ...
+
+    def run(self, source, **options) -> dict:
+        model = self.model
+        with model_lock(self.model_key):
+            return self._transcribe(model, source, **options)
+
+    def transcribe(self, audio: Union[str, SharedAudio]) -> dict:
+        return self.run(audio.samples if isinstance(audio, SharedAudio) else audio)
+
+    def transcribe_regions(self, audio: SharedAudio, regions: List[Region]) -> dict:
+        """Transcribe only the given speech regions, with timestamps on the original timeline.
+
+        The regions are concatenated into one buffer and transcribed in a single call, so Whisper
+        packs them into its 30 s windows back to back instead of decoding the silence between them.
+        """
+        speech = SpeechMap(audio.samples, regions, audio.sr)
+        total = audio.duration
+        skipped = 1 - speech.speech_seconds / total if total else 0.0
+        print(f"[ASR] Transcribing {speech.speech_seconds:.1f}s of speech out of {total:.1f}s "
+              f"({skipped:.0%} skipped)")
+        if not len(speech.samples):
+            return {"text": "", "segments": [], "language": None}
+
+        result = self.run(speech.samples)
+        for seg in result["segments"]:
+            seg["start"] = speech.to_original(seg["start"])
+            seg["end"] = max(seg["start"], speech.to_original(seg["end"], is_end=True))
+        return result
+
+    def transcribe_stream(self, audio: Union[str, SharedAudio], window: float = 30.0,
+                          overlap: float = 5.0) -> Iterator[dict]:
+        """Yield segments with absolute timestamps, transcribing one overlapping window at a time.
+
+        A segment belongs to the window in which it starts furthest from the edges: the overlap is
+        split in half between neighbouring windows, so nothing is emitted twice.
+
+        The end of the recording is found by decoding one window ahead rather than from a short
+        decode, since separate ffmpeg seeks may return a few samples less in the middle of a file.
+        """
+        if not 0 <= overlap < window:
+            raise ValueError("overlap must be smaller than window")
+        step = window - overlap
+
+        def decode(start: float):
+            if isinstance(audio, SharedAudio):
+                return audio.window(start, window)
+            return load_audio_window(audio, start, window)
+
+        window_start = 0.0
+        segment_id = 0
+        samples = decode(window_start)
+        while samples.size:
+            next_samples = decode(window_start + step)
+            # Audio the next window would own lies past the first half of the overlap; without any,
+            # this window is the last one.
+            is_last = next_samples.size <= int(overlap / 2 * SAMPLE_RATE)
+            result = self.run(samples, condition_on_previous_text=False)
+
+            owned_from = window_start + overlap / 2 if window_start > 0 else 0.0
+            owned_to = float("inf") if is_last else window_start + window - overlap / 2
+            for seg in result["segments"]:
+                start = window_start + seg["start"]
+                if not owned_from <= start < owned_to:
+                    continue
+                yield {**seg, "id": segment_id, "start": start, "end": window_start + seg["end"]}
+                segment_id += 1
+
+            if is_last:
+                break
+            window_start += step
+            samples = next_samples
+
+
+class WhisperASR(ASREngine):
+    name = "whisper"
 
-class WhisperASR:
     def __init__(self, model_size="small", device="cuda"):
-        self.model = whisper.load_model(model_size, device)
+        self.model_size = model_size
+        self.device = device
+
+    @property
+    def model_key(self) -> tuple:
+        return ("whisper", self.model_size, self.device)
+
+    @property
+    def config(self) -> dict:
+        return {"engine": self.name, "model_size": self.model_size}
+
+    def _load_model(self):
+        import whisper
+        return whisper.load_model(self.model_size, self.device)
+
+    def _transcribe(self, model, source, **options) -> dict:
+        return model.transcribe(source, **options)
+
+
+class FasterWhisperASR(ASREngine):
+    """Whisper on CTranslate2 (faster-whisper); int8 weights make it usable on CPU-only workers.
+
+    `cpu_threads=0` lets CTranslate2 pick the thread count.
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, model_size="small", device="cpu", compute_type="int8", beam_size=5, cpu_threads=0):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+        self.cpu_threads = cpu_threads
+
+    @property
+    def model_key(self) -> tuple:
+        return ("faster-whisper", self.model_size, self.device, self.compute_type, self.cpu_threads)
+
+    @property
+    def config(self) -> dict:
+        return {"engine": self.name, "model_size": self.model_size, "compute_type": self.compute_type,
+                "beam_size": self.beam_size}
+
+    def _load_model(self):
+        from faster_whisper import WhisperModel
+        return WhisperModel(self.model_size, device=self.device, compute_type=self.compute_type,
+                            cpu_threads=self.cpu_threads)
+
+    def _transcribe(self, model, source, **options) -> dict:
+        segments, info = model.transcribe(source, beam_size=self.beam_size, **options)
+        # Segments are generated lazily while decoding; collect them into Whisper's dict layout.
+        segments = [
+            {
+                "id": i,
+                "seek": seg.seek,
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text,
+                "tokens": list(seg.tokens),
+                "temperature": seg.temperature,
+                "avg_logprob": seg.avg_logprob,
+                "compression_ratio": seg.compression_ratio,
+                "no_speech_prob": seg.no_speech_prob,
+            }
+            for i, seg in enumerate(segments)
+        ]
+        return {"text": "".join(seg["text"] for seg in segments), "segments": segments, "language": info.language}
+
+
+ASR_ENGINES = {engine.name: engine for engine in (WhisperASR, FasterWhisperASR)}
+
+
+def default_device(engine: str) -> str:
+    """faster-whisper's int8 backend targets CPU-only workers; everything else runs on CUDA."""
+    return "cpu" if engine == "faster-whisper" else "cuda"
+
 
-    def transcribe(self, audio_path: str) -> dict:
-        result = self.model.transcribe(audio_path)
-        return result 
+def create_asr(engine: str = "whisper", **options) -> ASREngine:
+    if engine not in ASR_ENGINES:
+        raise ValueError(f"Unknown ASR engine {engine!r}, expected one of {sorted(ASR_ENGINES)}")
+    return ASR_ENGINES[engine](**options)
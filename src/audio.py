@@ -0,0 +1,112 @@
+import os
+import subprocess
+import tempfile
+import threading
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def load_audio_window(audio_path: str, start: float, duration: float, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode `duration` seconds from `start` as mono float32, without decoding the rest of the file."""
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-ss", f"{start:.3f}", "-t", f"{duration:.3f}", "-i", audio_path,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr), "-"
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+# WAV files at least this large are decoded into a memory-mapped temporary file instead of RAM.
+MMAP_MIN_BYTES = 256 * 1024 * 1024
+
+
+def _ffmpeg_decode_cmd(audio_path: str, sr: int, output: str) -> list:
+    return [
+        "ffmpeg", "-nostdin", "-threads", "0", "-y", "-i", audio_path,
+        "-f", "f32le", "-ac", "1", "-acodec", "pcm_f32le", "-ar", str(sr), output
+    ]
+
+
+def load_audio(audio_path: str, sr: int = SAMPLE_RATE, mmap: bool = False) -> np.ndarray:
+    """Decode and resample a whole file to mono float32.
+
+    With `mmap`, ffmpeg writes the samples to a temporary file that is memory-mapped copy-on-write
+    and unlinked right away, so pages are read from disk on demand and the file disappears once
+    the array is garbage collected.
+    """
+    if not mmap:
+        try:
+            out = subprocess.run(_ffmpeg_decode_cmd(audio_path, sr, "-"), capture_output=True, check=True).stdout
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
+        # bytearray keeps the array writable, which torch.from_numpy expects.
+        return np.frombuffer(bytearray(out), np.float32)
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".f32")
+    os.close(fd)
+    try:
+        try:
+            subprocess.run(_ffmpeg_decode_cmd(audio_path, sr, tmp_path), capture_output=True, check=True)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
+        if os.path.getsize(tmp_path) == 0:
+            return np.zeros(0, np.float32)
+        return np.memmap(tmp_path, dtype=np.float32, mode="c")
+    finally:
+        try:
+            os.unlink(tmp_path)
+        except OSError:  # Windows keeps mapped files open; the temp dir cleanup will get it
+            pass
+
+
+class SharedAudio:
+    """One recording decoded once, on first use, and shared by every model that needs the waveform.
+
+    Consumers get `samples` (or `window(...)` slices of it), which are views of the same buffer.
+    Nothing is decoded if no consumer asks, e.g. when ASR and diarization are both reused from a
+    checkpoint. Large WAV files are memory-mapped (see `load_audio`). `window` never triggers the
+    full decode, so streaming ASR alone keeps memory bounded by the window size.
+    """
+
+    def __init__(self, path: str, sr: int = SAMPLE_RATE, mmap_min_bytes: int = MMAP_MIN_BYTES):
+        self.path = path
+        self.sr = sr
+        self.mmap_min_bytes = mmap_min_bytes
+        self.lock = threading.Lock()
+        self._samples = None
+
+    @property
+    def samples(self) -> np.ndarray:
+        with self.lock:
+            if self._samples is None:
+                mmap = self.path.lower().endswith(".wav") and os.path.getsize(self.path) >= self.mmap_min_bytes
+                print(f"[Audio] Decoding {self.path}{' (memory-mapped)' if mmap else ''}...")
+                self._samples = load_audio(self.path, self.sr, mmap=mmap)
+            return self._samples
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sr
+
+    @property
+    def is_decoded(self) -> bool:
+        with self.lock:
+            return self._samples is not None
+
+    def window(self, start: float, duration: float) -> np.ndarray:
+        """A slice of the decoded buffer if another consumer already decoded it, else just that window."""
+        if not self.is_decoded:
+            return load_audio_window(self.path, start, duration, self.sr)
+        first = int(round(start * self.sr))
+        return self.samples[first:first + int(round(duration * self.sr))]
+
+    def waveform(self) -> dict:
+        """The samples in pyannote's in-memory format; the tensor shares memory with the buffer."""
+        import torch
+        return {"waveform": torch.from_numpy(self.samples).unsqueeze(0), "sample_rate": self.sr}
@@ -0,0 +1,58 @@
+import json
+import os
+import wave
+from typing import List
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".m4a", ".ogg")
+
+
+def collect_audio_files(source: str) -> List[str]:
+    """Audio files from a directory, or from a manifest (.json list or one path per line)."""
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, fname)
+            for fname in os.listdir(source)
+            if fname.lower().endswith(AUDIO_EXTENSIONS)
+        )
+
+    with open(source, "r", encoding="utf-8") as f:
+        if source.endswith(".json"):
+            paths = json.load(f)
+        else:
+            paths = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    base_dir = os.path.dirname(os.path.abspath(source))
+    return [p if os.path.isabs(p) else os.path.join(base_dir, p) for p in paths]
+
+
+def meeting_ids(audio_paths: List[str]) -> List[str]:
+    """AMI-style ids ("ES2016a.Mix-Headset.wav" -> "ES2016a"), falling back to the full stem on clashes.
+
+    Ids name the output folders, so they are always unique: a stem still shared by several files
+    (the same name in two manifest directories) gets "-2", "-3", ... from its second occurrence on.
+    """
+    ids = [os.path.basename(p).split(".")[0] for p in audio_paths]
+    if len(set(ids)) != len(ids):
+        ids = [os.path.splitext(os.path.basename(p))[0] for p in audio_paths]
+    taken = set(ids)
+    seen = set()
+    for i, meeting_id in enumerate(ids):
+        if meeting_id in seen:
+            n = 2
+            while f"{meeting_id}-{n}" in taken:
+                n += 1
+            ids[i] = f"{meeting_id}-{n}"
+            taken.add(ids[i])
+        seen.add(meeting_id)
+    return ids
+
+
+def audio_duration(audio_path: str) -> float:
+    if audio_path.lower().endswith(".wav"):
+        try:
+            with wave.open(audio_path, "rb") as f:
+                return f.getnframes() / f.getframerate()
+        except wave.Error:  # float and WAVE_FORMAT_EXTENSIBLE files, which `wave` does not read
+            pass
+    import torchaudio
+    info = torchaudio.info(audio_path)
+    return info.num_frames / info.sample_rate
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable
+
+from src.scheduler import Stage
+
+
+def hash_values(*values) -> str:
+    payload = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Checkpointer:
+    """Skips stages whose inputs are unchanged since the last run in the same save_path.
+
+    A stage's key hashes its config (model names, prompt text, ...) together with the digests
+    of the artifacts its dependencies produced. After a stage runs, the digest of its own
+    artifact is recorded, so downstream stages only re-run when that output actually changed.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, save_path: str, force: Iterable[str] = ()):
+        self.save_path = save_path
+        self.path = os.path.join(save_path, self.MANIFEST)
+        self.force = set(force)
+        self.lock = threading.Lock()
+        self.digests: Dict[str, str] = {}
+        self.manifest: Dict[str, Any] = {"stages": {}, "files": {}}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def source_digest(self, path: str) -> str:
+        """Digest of an input file, reusing the recorded one while its size and mtime are unchanged."""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with self.lock:
+            entry = self.manifest["files"].get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry["digest"]
+        digest = file_digest(path)
+        with self.lock:
+            self.manifest["files"][key] = {"size": stat.st_size, "mtime": stat.st_mtime, "digest": digest}
+            self._save()
+        return digest
+
+    def is_forced(self, name: str) -> bool:
+        return "all" in self.force or name in self.force
+
+    def wrap(self, stage: Stage) -> Stage:
+        if stage.artifact is None:
+            return stage
+
+        def run(**deps):
+            artifact = os.path.join(self.save_path, stage.artifact)
+            key = hash_values(stage.name, stage.config, {d: self.digests.get(d) for d in stage.deps})
+            with self.lock:
+                entry = self.manifest["stages"].get(stage.name)
+            if (not self.is_forced(stage.name) and entry and entry["key"] == key
+                    and os.path.exists(artifact) and file_digest(artifact) == entry["digest"]):
+                print(f"[Pipeline] Reusing {stage.artifact} for stage '{stage.name}'")
+                result = stage.load(artifact)
+                digest = entry["digest"]
+            else:
+                result = stage.fn(**deps)
+                digest = file_digest(artifact)
+                with self.lock:
+                    self.manifest["stages"][stage.name] = {"key": key, "digest": digest, "artifact": stage.artifact}
+                    self._save()
+            self.digests[stage.name] = digest
+            return result
+
+        return Stage(stage.name, run, deps=stage.deps, kind=stage.kind)
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.path)
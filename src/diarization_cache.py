@@ -0,0 +1,81 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.checkpoint import file_digest
+
+
+class DiarizationCache:
+    """Diarizations and pyannote's intermediate features on disk, keyed by audio content.
+
+    Results (`<key>.result.npz`: turn starts, ends and labels plus the timeline offset) are keyed
+    by audio digest, model and every pipeline parameter including the speaker count. Segmentations
+    and speaker embeddings (`<key>.features.npz`) only depend on the audio, the models and the
+    segmentation parameters, so a run with a different number of speakers re-clusters them
+    without re-extracting. Keys come from the pipeline's config.yaml, so a hit never loads pyannote.
+    """
+
+    def __init__(self, root: str = ".cache/diarization"):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.lock = threading.Lock()
+        self._digests: Dict[tuple, str] = {}
+
+    def audio_digest(self, path: str) -> str:
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            digest = self._digests.get(memo_key)
+        if digest is None:
+            digest = file_digest(path)
+            with self.lock:
+                self._digests[memo_key] = digest
+        return digest
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.root, key + ext)
+
+    def _save_npz(self, path: str, **arrays):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def load_result(self, key: str) -> Optional[Tuple[object, float]]:
+        """(annotation, offset) as returned by SpeakerDiarizer.diarize_with_offset, or None."""
+        path = self._path(key, ".result.npz")
+        if not os.path.exists(path):
+            return None
+        from pyannote.core import Annotation, Segment
+        with np.load(path) as data:
+            annotation = Annotation()
+            for track, (start, end, label) in enumerate(zip(data["start"], data["end"], data["label"])):
+                annotation[Segment(float(start), float(end)), track] = str(label)
+            return annotation, float(data["offset"])
+
+    def save_result(self, key: str, annotation, offset: float):
+        turns = [(segment.start, segment.end, label) for segment, _, label in annotation.itertracks(yield_label=True)]
+        self._save_npz(self._path(key, ".result.npz"),
+                       start=np.array([t[0] for t in turns], dtype=np.float64),
+                       end=np.array([t[1] for t in turns], dtype=np.float64),
+                       label=np.array([t[2] for t in turns], dtype=str),
+                       offset=np.float64(offset))
+
+    def load_features(self, key: str):
+        """(segmentations, embeddings) as pyannote passes them around, or None."""
+        path = self._path(key, ".features.npz")
+        if not os.path.exists(path):
+            return None
+        from pyannote.core import SlidingWindow, SlidingWindowFeature
+        with np.load(path) as data:
+            start, duration, step = map(float, data["window"])
+            segmentations = SlidingWindowFeature(data["segmentations"],
+                                                 SlidingWindow(start=start, duration=duration, step=step))
+            return segmentations, data["embeddings"]
+
+    def save_features(self, key: str, segmentations, embeddings: np.ndarray):
+        window = segmentations.sliding_window
+        self._save_npz(self._path(key, ".features.npz"), segmentations=segmentations.data, embeddings=embeddings,
+                       window=np.array([window.start, window.duration, window.step]))
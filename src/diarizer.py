@@ -1,17 +1,128 @@
-from pyannote.audio import Pipeline
-import torch
+from functools import cached_property
+from typing import Optional, Union
+
+from src.audio import SharedAudio
+from src.checkpoint import hash_values
+from src.diarization_cache import DiarizationCache
+from src.model_registry import get_model, model_lock
+
+DIARIZATION_MODEL = "pyannote/speaker-diarization@2.1"
+
 
 class SpeakerDiarizer:
-    def __init__(self, hf_token: str, device="cuda"):
-        self.pipeline = Pipeline.from_pretrained(
-            "pyannote/speaker-diarization@2.1",
-            use_auth_token=hf_token
+    def __init__(self, hf_token: str, device="cuda", cache_dir: Optional[str] = None, num_speakers: int = None,
+                 min_speakers: int = None, max_speakers: int = None):
+        self.hf_token = hf_token
+        self.device = device
+        self.cache = DiarizationCache(cache_dir) if cache_dir else None
+        self.speaker_options = {
+            key: value for key, value in
+            (("num_speakers", num_speakers), ("min_speakers", min_speakers), ("max_speakers", max_speakers))
+            if value is not None
+        }
+
+    @property
+    def model_key(self) -> tuple:
+        return ("pyannote", DIARIZATION_MODEL, self.device)
+
+    @property
+    def pipeline(self):
+        return get_model(self.model_key, self._load_pipeline)
+
+    @cached_property
+    def pipeline_config(self) -> dict:
+        """The pipeline's config.yaml: model names under "pipeline", tuned hyper-parameters under "params".
+
+        Read straight from the hub cache, so cache keys can be built without loading any model.
+        """
+        import yaml
+        from huggingface_hub import hf_hub_download
+        repo_id, _, revision = DIARIZATION_MODEL.partition("@")
+        path = hf_hub_download(repo_id, "config.yaml", revision=revision or None, token=self.hf_token or None)
+        with open(path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f)
+
+    def _load_pipeline(self):
+        import torch
+        from pyannote.audio import Pipeline
+        pipeline = Pipeline.from_pretrained(
+            DIARIZATION_MODEL,
+            use_auth_token=self.hf_token
         )
-        self.pipeline.to(torch.device(device))
+        pipeline.to(torch.device(self.device))
+        return pipeline
+
+    def diarize(self, audio: Union[str, SharedAudio]):
+        return self.diarize_with_offset(audio)[0]
+
+    def diarize_with_offset(self, audio: Union[str, SharedAudio]):
+        """The diarization, shifted to start at 0, and the shift (the onset of the first speech turn)."""
+        result_key = features_key = None
+        if self.cache:
+            # Keyed on the config rather than the instantiated pipeline, so a hit never loads pyannote.
+            digest = self.cache.audio_digest(audio.path if isinstance(audio, SharedAudio) else audio)
+            params = self.pipeline_config.get("params", {})
+            result_key = hash_values(digest, DIARIZATION_MODEL, params, self.speaker_options)
+            cached = self.cache.load_result(result_key)
+            if cached is not None:
+                print("[Diarizer] Reusing cached diarization")
+                return cached
+            features_key = hash_values(digest, DIARIZATION_MODEL, params.get("segmentation"),
+                                       self.pipeline_config.get("pipeline", {}).get("params", {}))
+
+        pipeline = self.pipeline
+        # pyannote accepts a path or an in-memory {"waveform": (channel, time) tensor, "sample_rate": ...}.
+        source = audio.waveform() if isinstance(audio, SharedAudio) else audio
+        with model_lock(self.model_key):
+            if features_key:
+                diarization = self._apply_with_cached_features(pipeline, source, features_key)
+            else:
+                diarization = pipeline(source, **self.speaker_options)
 
-    def diarize(self, audio_path: str):
-        diarization = self.pipeline(audio_path)
+        diarization, offset = self.normalize_offset(diarization)
+        if result_key:
+            self.cache.save_result(result_key, diarization, offset)
+        return diarization, offset
 
+    def _apply_with_cached_features(self, pipeline, source, features_key: str):
+        """Run the pipeline with segmentations and embeddings from the cache, or record them for it.
+
+        Only clustering (and what follows) runs on a hit. The caller holds the model lock, so
+        overriding the two steps on the shared pipeline instance is safe.
+        """
+        features = self.cache.load_features(features_key)
+        captured = {}
+        if features is not None:
+            print("[Diarizer] Reusing cached segmentations and speaker embeddings")
+            segmentations, embeddings = features
+            pipeline.get_segmentations = lambda *args, **kwargs: segmentations
+            pipeline.get_embeddings = lambda *args, **kwargs: embeddings
+        else:
+            get_segmentations, get_embeddings = pipeline.get_segmentations, pipeline.get_embeddings
+
+            def record_segmentations(*args, **kwargs):
+                captured["segmentations"] = get_segmentations(*args, **kwargs)
+                return captured["segmentations"]
+
+            def record_embeddings(*args, **kwargs):
+                captured["embeddings"] = get_embeddings(*args, **kwargs)
+                return captured["embeddings"]
+
+            pipeline.get_segmentations = record_segmentations
+            pipeline.get_embeddings = record_embeddings
+        try:
+            diarization = pipeline(source, **self.speaker_options)
+        finally:
+            # Drop the instance attributes so the class methods are visible again.
+            del pipeline.get_segmentations
+            del pipeline.get_embeddings
+        if len(captured) == 2:
+            self.cache.save_features(features_key, captured["segmentations"], captured["embeddings"])
+        return diarization
+
+    @staticmethod
+    def normalize_offset(diarization):
+        """Shift the timeline so the first turn starts at 0; returns the shifted annotation and the shift."""
         #'''
         first_segment = next(diarization.itertracks(yield_label=False))[0]
         offset = first_segment.start
@@ -24,7 +135,25 @@ class SpeakerDiarizer:
             for segment, track, label in diarization.itertracks(yield_label=True):
                 new_seg = Segment(start=segment.start - offset, end=segment.end - offset)
                 normalized[new_seg, track] = label
-            return normalized
+            return normalized, offset
         #'''
-        return diarization
+        return diarization, 0.0
+
+
+def save_rttm(diarization, path: str, uri: str = "audio"):
+    with open(path, "w", encoding="utf-8") as f:
+        for segment, _, label in diarization.itertracks(yield_label=True):
+            f.write(f"SPEAKER {uri} 1 {segment.start:.6f} {segment.duration:.6f} <NA> <NA> {label} <NA> <NA>\n")
+
 
+def load_rttm(path: str):
+    from pyannote.core import Annotation, Segment
+    annotation = Annotation()
+    with open(path, "r", encoding="utf-8") as f:
+        for track, line in enumerate(f):
+            fields = line.split()
+            if len(fields) < 8 or fields[0] != "SPEAKER":
+                continue
+            start, duration = float(fields[3]), float(fields[4])
+            annotation[Segment(start, start + duration), track] = fields[7]
+    return annotation
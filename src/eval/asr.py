@@ -1,34 +1,25 @@
-import os
 import json
-import xml.etree.ElementTree as ET
-from jiwer import wer, cer
+from typing import Optional
+import numpy as np
+from jiwer import process_characters, process_words
+from src.eval.corpus import load_words
 
 
 class ASREvaluator:
-    def __init__(self, ref_dir: str, hyp_path: str):
+    def __init__(self, ref_dir: str, hyp_path: str, meeting_id: Optional[str] = None):
         self.ref_dir = ref_dir
         self.hyp_path = hyp_path
+        self.meeting_id = meeting_id
 
     def load_reference_text(self):
-        all_words = []
+        table = load_words(self.ref_dir, self.meeting_id)
+        keep = np.array([bool(text) for text in table.text], dtype=bool) & ~np.isnan(table.start)
+        keep = np.flatnonzero(keep)
+        if keep.size == 0:
+            raise ValueError("No reference words found.")
+        order = keep[np.argsort(table.start[keep], kind="stable")]
 
-        for fname in os.listdir(self.ref_dir):
-            if not fname.endswith(".words.xml"):
-                continue
-
-            path = os.path.join(self.ref_dir, fname)
-            tree = ET.parse(path)
-            root = tree.getroot()
-
-            for word in root.findall(".//w"):
-                text = word.text
-                start = word.attrib.get("starttime")
-                if text and start:
-                    all_words.append((float(start), text.lower()))
-
-        all_words.sort(key=lambda x: x[0])
-
-        return " ".join(word for _, word in all_words)
+        return " ".join(table.text[i].lower() for i in order)
 
     def load_hypothesis_text(self):
         with open(self.hyp_path, "r", encoding="utf-8") as f:
@@ -44,14 +35,21 @@ class ASREvaluator:
         hyp = self.load_hypothesis_text()
 
         print("[ASREval] Calculating metrics...")
-        wer_score = wer(ref, hyp)
-        cer_score = cer(ref, hyp)
+        words = process_words(ref, hyp)
+        chars = process_characters(ref, hyp)
+        wer_score = words.wer
+        cer_score = chars.cer
 
         print(f"WER: {wer_score:.3f}")
         print(f"CER: {cer_score:.3f}")
 
         return {
             "wer": wer_score,
-            "cer": cer_score
+            "cer": cer_score,
+            # Edit and reference counts, so corpus-level (micro) rates can be summed across meetings.
+            "word_errors": words.substitutions + words.deletions + words.insertions,
+            "ref_words": words.substitutions + words.deletions + words.hits,
+            "char_errors": chars.substitutions + chars.deletions + chars.insertions,
+            "ref_chars": chars.substitutions + chars.deletions + chars.hits,
         }
 
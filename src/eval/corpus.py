@@ -0,0 +1,142 @@
+import os
+import pickle
+import threading
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+import numpy as np
+
+NITE_ID = "{http://nite.sourceforge.net/}id"
+CACHE_DIR = ".cache"
+CACHE_VERSION = 1
+
+
+class WordTable:
+    """All <w> elements of a set of AMI *.words.xml files as parallel arrays.
+
+    Missing start/end times are NaN; `speaker` indexes into `speakers`, which holds the
+    per-file speaker letter taken from the root id (e.g. "A" for "ES2016a.A.words").
+    """
+
+    def __init__(self, ids: List[str], start: np.ndarray, end: np.ndarray, speaker: np.ndarray,
+                 speakers: List[str], text: List[str]):
+        self.ids = ids
+        self.start = start
+        self.end = end
+        self.speaker = speaker
+        self.speakers = speakers
+        self.text = text
+        self._times_by_id = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def timed(self) -> np.ndarray:
+        """Mask of words with both a non-negative start and end time."""
+        with np.errstate(invalid="ignore"):
+            return (self.start >= 0) & (self.end >= 0)
+
+    def times_by_id(self) -> Dict[str, Dict[str, float]]:
+        if self._times_by_id is None:
+            timed = self.timed()
+            self._times_by_id = {
+                wid: {"start": float(self.start[i]), "end": float(self.end[i])}
+                for i, wid in enumerate(self.ids) if wid and timed[i]
+            }
+        return self._times_by_id
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_times_by_id"] = None
+        return state
+
+
+def _parse_words_file(path: str):
+    speaker, ids, starts, ends, texts = "", [], [], [], []
+    root = None
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if root is None:
+            root = elem
+            root_id = elem.attrib.get(NITE_ID, "")
+            speaker = root_id.split(".")[1] if "." in root_id else root_id
+            continue
+        if event != "end" or elem.tag != "w":
+            continue
+        ids.append(elem.attrib.get(NITE_ID))
+        starts.append(float(elem.attrib.get("starttime", "nan")))
+        ends.append(float(elem.attrib.get("endtime", "nan")))
+        texts.append(elem.text or "")
+        root.clear()
+    return speaker, ids, starts, ends, texts
+
+
+def _words_files(words_dir: str, meeting_id: Optional[str]) -> List[str]:
+    return sorted(
+        fname for fname in os.listdir(words_dir)
+        if fname.endswith(".words.xml") and (meeting_id is None or fname.startswith(meeting_id + "."))
+    )
+
+
+def _build_table(words_dir: str, fnames: List[str]) -> WordTable:
+    speakers, ids, starts, ends, speaker_idx, texts = [], [], [], [], [], []
+    for fname in fnames:
+        speaker, f_ids, f_starts, f_ends, f_texts = _parse_words_file(os.path.join(words_dir, fname))
+        if speaker not in speakers:
+            speakers.append(speaker)
+        ids.extend(f_ids)
+        starts.extend(f_starts)
+        ends.extend(f_ends)
+        texts.extend(f_texts)
+        speaker_idx.extend([speakers.index(speaker)] * len(f_ids))
+    return WordTable(ids, np.array(starts, dtype=np.float64), np.array(ends, dtype=np.float64),
+                     np.array(speaker_idx, dtype=np.int16), speakers, texts)
+
+
+_memo: Dict[tuple, WordTable] = {}
+_memo_lock = threading.Lock()
+
+
+def load_words(words_dir: str, meeting_id: Optional[str] = None, use_cache: bool = True) -> WordTable:
+    """Load (and cache) the word table for every meeting in `words_dir`, or just `meeting_id`.
+
+    Tables are memoized in-process and pickled under `<words_dir>/.cache/`; both are keyed by the
+    names, sizes and mtimes of the source files, so editing an XML file invalidates them.
+    """
+    fnames = _words_files(words_dir, meeting_id)
+    stamps = []
+    for fname in fnames:
+        stat = os.stat(os.path.join(words_dir, fname))
+        stamps.append((fname, stat.st_size, stat.st_mtime_ns))
+    key = (os.path.abspath(words_dir), meeting_id, tuple(stamps))
+
+    with _memo_lock:
+        if key in _memo:
+            return _memo[key]
+
+    cache_path = os.path.join(words_dir, CACHE_DIR, f"words-{meeting_id or 'all'}.pkl")
+    table = None
+    if use_cache and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("version") == CACHE_VERSION and cached.get("stamps") == stamps:
+                table = cached["table"]
+        except Exception as e:
+            print(f"[Corpus] Ignoring unreadable cache {cache_path}: {e!r}")
+
+    if table is None:
+        table = _build_table(words_dir, fnames)
+        if use_cache:
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                tmp_path = cache_path + f".{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump({"version": CACHE_VERSION, "stamps": stamps, "table": table}, f,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                print(f"[Corpus] Could not write cache {cache_path}: {e!r}")
+
+    with _memo_lock:
+        _memo[key] = table
+    return table
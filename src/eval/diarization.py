@@ -1,66 +1,89 @@
-import os
 import json
-from typing import Dict
-import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
 from pyannote.core import Annotation, Segment
+from pyannote.core.segment import SEGMENT_PRECISION
 from pyannote.metrics.diarization import DiarizationErrorRate
 import numpy as np
 from scipy.optimize import linear_sum_assignment
+from src.eval.corpus import load_words
 
+# (start, end, label) arrays, one entry per segment.
+Segments = Tuple[np.ndarray, np.ndarray, np.ndarray]
 
-class DiarizationEvaluator:
-    def __init__(self, ref_dir: str, hyp_path: str):
-        self.ref_dir = ref_dir
-        self.hyp_path = hyp_path
 
-    def load_reference(self) -> Annotation:
-        reference = Annotation()
-        all_segments = []
+def make_segments(starts, ends, labels) -> Segments:
+    """Build segment arrays with the same semantics as `annotation[Segment(start, end)] = label`:
+    empty segments are dropped and a repeated (start, end) keeps its last label."""
+    unique = {}
+    for start, end, label in zip(starts, ends, labels):
+        if end - start > SEGMENT_PRECISION:
+            unique[(start, end)] = label
+    starts = np.fromiter((k[0] for k in unique), dtype=np.float64, count=len(unique))
+    ends = np.fromiter((k[1] for k in unique), dtype=np.float64, count=len(unique))
+    return starts, ends, np.array(list(unique.values()), dtype=object)
 
-        for fname in sorted(os.listdir(self.ref_dir)):
-            if not fname.endswith(".words.xml"):
-                continue
-            path = os.path.join(self.ref_dir, fname)
-            tree = ET.parse(path)
-            root = tree.getroot()
 
-            speaker = root.attrib.get("{http://nite.sourceforge.net/}id", "")
-            speaker_id = speaker.split(".")[1] if "." in speaker else speaker
-            speaker_id = f"SPEAKER_{speaker_id[-1]}"
+def to_annotation(segments: Segments) -> Annotation:
+    annotation = Annotation()
+    for start, end, label in zip(*segments):
+        annotation[Segment(float(start), float(end))] = label
+    return annotation
 
-            for w in root.findall(".//w"):
-                start = float(w.attrib.get("starttime", -1))
-                end = float(w.attrib.get("endtime", -1))
-                if start >= 0 and end >= 0:
-                    all_segments.append((start, end, speaker_id))
 
-        if not all_segments:
-            raise ValueError("No reference segments found.")
+def overlap_matrix(reference: Segments, hypothesis: Segments, ref_labels: List[str],
+                   hyp_labels: List[str]) -> np.ndarray:
+    """Total overlap between every reference and hypothesis label, summed over all segment pairs.
 
-        # Normalize timestamps
-        min_start = min(start for start, _, _ in all_segments)
-        for start, end, speaker in all_segments:
-            reference[Segment(start - min_start, end - min_start)] = speaker
+    For one hypothesis label, C(t) = sum_j |[s_j, e_j) ∩ (-inf, t)| is piecewise linear and can be
+    evaluated for many t at once from the sorted starts and ends and their prefix sums. The overlap
+    of a reference segment [a, b) with all of that label's segments is then C(b) - C(a).
+    """
+    ref_start, ref_end, ref_label = reference
+    hyp_start, hyp_end, hyp_label = hypothesis
+    ref_index = {label: i for i, label in enumerate(ref_labels)}
+    ref_rows = np.array([ref_index[label] for label in ref_label], dtype=np.int64)
 
-        return reference
+    cmatrix = np.zeros((len(ref_labels), len(hyp_labels)))
+    for j, label in enumerate(hyp_labels):
+        mask = hyp_label == label
+        starts, ends = np.sort(hyp_start[mask]), np.sort(hyp_end[mask])
+        start_sums = np.concatenate(([0.0], np.cumsum(starts)))
+        end_sums = np.concatenate(([0.0], np.cumsum(ends)))
 
-    def greedy_mapping(self, reference, hypothesis) -> Dict[str, str]:
-        ref_speakers = sorted(set(label for _, _, label in reference.itertracks(yield_label=True)))
-        hyp_speakers = sorted(
-            set(label for _, _, label in hypothesis.itertracks(yield_label=True) if label != "unknown"))
+        def covered_before(t: np.ndarray) -> np.ndarray:
+            n_started = np.searchsorted(starts, t, side="left")
+            n_ended = np.searchsorted(ends, t, side="left")
+            return (n_started * t - start_sums[n_started]) - (n_ended * t - end_sums[n_ended])
 
-        ref_map = {label: idx for idx, label in enumerate(ref_speakers)}
-        hyp_map = {label: idx for idx, label in enumerate(hyp_speakers)}
+        overlaps = covered_before(ref_end) - covered_before(ref_start)
+        cmatrix[:, j] = np.bincount(ref_rows, weights=overlaps, minlength=len(ref_labels))
+    return cmatrix
 
-        cmatrix = np.zeros((len(ref_speakers), len(hyp_speakers)))
 
-        for ref_seg, _, ref_label in reference.itertracks(yield_label=True):
-            for hyp_seg, _, hyp_label in hypothesis.itertracks(yield_label=True):
-                if hyp_label == "unknown":
-                    continue
-                overlap = ref_seg & hyp_seg
-                if overlap:
-                    cmatrix[ref_map[ref_label], hyp_map[hyp_label]] += overlap.duration
+class DiarizationEvaluator:
+    def __init__(self, ref_dir: str, hyp_path: str, meeting_id: Optional[str] = None):
+        self.ref_dir = ref_dir
+        self.hyp_path = hyp_path
+        self.meeting_id = meeting_id
+
+    def load_reference(self) -> Segments:
+        table = load_words(self.ref_dir, self.meeting_id)
+        timed = np.flatnonzero(table.timed())
+
+        if timed.size == 0:
+            raise ValueError("No reference segments found.")
+
+        # Normalize timestamps
+        min_start = table.start[timed].min()
+        labels = np.array([f"SPEAKER_{speaker[-1]}" for speaker in table.speakers], dtype=object)
+        return make_segments((table.start[timed] - min_start).tolist(), (table.end[timed] - min_start).tolist(),
+                             labels[table.speaker[timed]])
+
+    def greedy_mapping(self, reference: Segments, hypothesis: Segments) -> Dict[str, str]:
+        ref_speakers = sorted(set(reference[2]))
+        hyp_speakers = sorted(set(label for label in hypothesis[2] if label != "unknown"))
+
+        cmatrix = overlap_matrix(reference, hypothesis, ref_speakers, hyp_speakers)
 
         if np.all(cmatrix == 0):
             return {}  # no overlap found
@@ -68,18 +91,12 @@ class DiarizationEvaluator:
         row_ind, col_ind = linear_sum_assignment(-cmatrix)  # maximize overlap
         return {hyp_speakers[j]: ref_speakers[i] for i, j in zip(row_ind, col_ind)}
 
-    def load_hypothesis(self) -> Annotation:
-        hypothesis = Annotation()
+    def load_hypothesis(self) -> Segments:
         with open(self.hyp_path, "r") as f:
             segments = json.load(f)['segments']
 
-        for seg in segments:
-            start = seg["start"]
-            end = seg["end"]
-            speaker = seg["speaker"]
-            hypothesis[Segment(start, end)] = speaker
-
-        return hypothesis
+        return make_segments([seg["start"] for seg in segments], [seg["end"] for seg in segments],
+                             [seg["speaker"] for seg in segments])
 
     def evaluate(self):
         print("[DiarizationEval] Loading reference...")
@@ -90,11 +107,18 @@ class DiarizationEvaluator:
 
         print("[DiarizationEval] Mapping speakers...")
         mapping = self.greedy_mapping(reference, hypothesis)
-        mapped_hypothesis = hypothesis.rename_labels(mapping)
+        mapped_hypothesis = to_annotation(hypothesis).rename_labels(mapping)
 
         print("[DiarizationEval] Calculating DER...")
         metric = DiarizationErrorRate()
-        der = metric(reference, mapped_hypothesis)
+        details = metric(to_annotation(reference), mapped_hypothesis, detailed=True)
+        der = details["diarization error rate"]
         print(f"DER: {der:.3f}")
 
-
+        return {
+            "der": der,
+            "total": details["total"],
+            "confusion": details["confusion"],
+            "missed_detection": details["missed detection"],
+            "false_alarm": details["false alarm"],
+        }
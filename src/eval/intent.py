@@ -1,15 +1,27 @@
 import os
 import re
 import json
+from bisect import bisect_left
 import xml.etree.ElementTree as ET
-from typing import List, Dict
+from typing import List, Dict, Optional
 from sklearn.metrics import classification_report
+from src.eval.corpus import load_words
+
+ID_RE = re.compile(r'id\(([^)]+)\)')
+MATCH_POLICIES = ("first", "best")
 
 
 class IntentEvaluator:
-    def __init__(self, words_dir: str, dialog_act_dir: str, intents_path: str, intents_dict_path: str, hyp_utterances_path: str):
+    def __init__(self, words_dir: str, dialog_act_dir: str, intents_path: str, intents_dict_path: str, hyp_utterances_path: str,
+                 match_policy: str = "first", meeting_id: Optional[str] = None):
+        if match_policy not in MATCH_POLICIES:
+            raise ValueError(f"match_policy must be one of {MATCH_POLICIES}")
+        self.match_policy = match_policy
+        self.meeting_id = meeting_id
         self.word_times = self.load_word_times(words_dir)
         self.dialog_act_paths = self.collect_dialog_act_files(dialog_act_dir)
+        if not self.dialog_act_paths:
+            raise ValueError("No dialog act files found.")
         self.intents_dict = self.load_json(intents_dict_path)
         self.intents = self.load_json(intents_path)
         self.hyp_utterances = self.load_json(hyp_utterances_path)
@@ -20,6 +32,7 @@ class IntentEvaluator:
             os.path.join(dialog_act_dir, fname)
             for fname in os.listdir(dialog_act_dir)
             if fname.endswith(".dialog-act.xml")
+            and (self.meeting_id is None or fname.startswith(self.meeting_id + "."))
         ]
 
     def load_json(self, path: str):
@@ -27,19 +40,7 @@ class IntentEvaluator:
             return json.load(f)
 
     def load_word_times(self, words_dir: str) -> Dict[str, Dict[str, float]]:
-        word_times = {}
-        for fname in os.listdir(words_dir):
-            if not fname.endswith(".words.xml"):
-                continue
-            tree = ET.parse(os.path.join(words_dir, fname))
-            root = tree.getroot()
-            for w in root.findall(".//w"):
-                wid = w.attrib.get("{http://nite.sourceforge.net/}id")
-                start = float(w.attrib.get("starttime", -1))
-                end = float(w.attrib.get("endtime", -1))
-                if wid and start >= 0 and end >= 0:
-                    word_times[wid] = {"start": start, "end": end}
-        return word_times
+        return load_words(words_dir, self.meeting_id).times_by_id()
 
     def parse_intents(self) -> List[Dict]:
         results = []
@@ -55,7 +56,7 @@ class IntentEvaluator:
                     continue
 
                 href = pointer.attrib.get("href", "")
-                match = re.search(r'id\(([^)]+)\)', href)
+                match = ID_RE.search(href)
                 if not match:
                     continue
 
@@ -70,7 +71,7 @@ class IntentEvaluator:
                     continue
 
                 href = child.attrib.get("href", "")
-                ids = re.findall(r'id\(([^)]+)\)', href)
+                ids = ID_RE.findall(href)
                 times = [self.word_times[i] for i in ids if i in self.word_times]
 
                 if not times:
@@ -86,19 +87,34 @@ class IntentEvaluator:
         return results
 
     def match_utterances_to_labels(self) -> List[Dict]:
+        """Label each hypothesis utterance with a reference act covering more than half of it.
+
+        With the "first" policy the earliest such act in annotation order wins (the original rule);
+        with "best" the act with the largest overlap does. Acts are sorted by start time, so only
+        those that can overlap an utterance are looked at.
+        """
         labeled = []
         id_to_time = {u["id"]: (u["start"], u["end"]) for u in self.hyp_utterances}
         id_to_pred = {u["id"]: u["intent"].lower() for u in self.intents}
 
+        order = sorted(range(len(self.ref_intents)), key=lambda i: self.ref_intents[i]["start"])
+        starts = [self.ref_intents[i]["start"] for i in order]
+        max_len = max((r["end"] - r["start"] for r in self.ref_intents), default=0.0)
+
         for uid, (ustart, uend) in id_to_time.items():
             pred = id_to_pred.get(uid, "other").lower()
-            match = None
-            for r in self.ref_intents:
+            best = None
+            # Acts starting before ustart - max_len end before the utterance starts.
+            for pos in range(bisect_left(starts, ustart - max_len), bisect_left(starts, uend)):
+                idx = order[pos]
+                r = self.ref_intents[idx]
                 overlap = max(0, min(uend, r["end"]) - max(ustart, r["start"]))
-                if overlap > 0.5 * (uend - ustart):
-                    match = r["intent"].lower()
-                    break
-            labeled.append({"id": uid, "pred": pred, "true": match or "other"})
+                if overlap <= 0.5 * (uend - ustart):
+                    continue
+                key = (-idx,) if self.match_policy == "first" else (overlap, -idx)
+                if best is None or key > best[0]:
+                    best = (key, r["intent"].lower())
+            labeled.append({"id": uid, "pred": pred, "true": best[1] if best else "other"})
         return labeled
 
     def evaluate(self):
@@ -108,6 +124,23 @@ class IntentEvaluator:
         print("[INTENT DETECTION EVAL]")
         print(classification_report(y_true, y_pred, zero_division=0))
 
+        report = classification_report(y_true, y_pred, zero_division=0, output_dict=True)
+        # Per-label true/false positive and false negative counts let the corpus runner pool meetings.
+        counts = {}
+        for true, pred in zip(y_true, y_pred):
+            if true == pred:
+                counts.setdefault(true, {"tp": 0, "fp": 0, "fn": 0})["tp"] += 1
+            else:
+                counts.setdefault(pred, {"tp": 0, "fp": 0, "fn": 0})["fp"] += 1
+                counts.setdefault(true, {"tp": 0, "fp": 0, "fn": 0})["fn"] += 1
+        return {
+            "accuracy": report["accuracy"],
+            "macro_f1": report["macro avg"]["f1-score"],
+            "weighted_f1": report["weighted avg"]["f1-score"],
+            "support": len(labeled),
+            "counts": counts,
+        }
+
     def debug(self):
         print(self.ref_intents)
         pass
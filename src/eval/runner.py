@@ -0,0 +1,284 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+TASKS = ("asr", "diarization", "topics", "summary", "intent")
+
+
+class CorpusLayout:
+    """Where the AMI references and the pipeline outputs of one meeting live.
+
+    References follow the layout of `data/`: words/, dialogue_acts/, topics/<id>.topic.xml,
+    sum/<id>summ.txt plus the shared topics/topic_map.json and intents/intents_dict.json.
+    Hypotheses are read from `<hyp_root>/<id>/` as written by `Pipeline.run_many`. Only when
+    `allow_flat` is set (a single meeting is evaluated) may they come from `hyp_root` itself, the
+    layout of a single `Pipeline.run`; otherwise a missing meeting directory is an error, so a
+    meeting without outputs is never scored against another meeting's files.
+    """
+
+    def __init__(self, ref_root: str, hyp_root: str, allow_flat: bool = False):
+        self.ref_root = ref_root
+        self.hyp_root = hyp_root
+        self.allow_flat = allow_flat
+
+    def ref(self, *parts: str) -> str:
+        return os.path.join(self.ref_root, *parts)
+
+    def hyp(self, meeting_id: str, name: str) -> str:
+        meeting_dir = os.path.join(self.hyp_root, meeting_id)
+        if os.path.isdir(meeting_dir):
+            return os.path.join(meeting_dir, name)
+        if not self.allow_flat:
+            raise FileNotFoundError(f"No outputs for {meeting_id}: {meeting_dir} does not exist")
+        return os.path.join(self.hyp_root, name)
+
+
+def _eval_asr(meeting_id: str, layout: CorpusLayout) -> dict:
+    from src.eval.asr import ASREvaluator
+    return ASREvaluator(layout.ref("words"), layout.hyp(meeting_id, "asr_output.json"), meeting_id).evaluate()
+
+
+def _eval_diarization(meeting_id: str, layout: CorpusLayout) -> dict:
+    from src.eval.diarization import DiarizationEvaluator
+    return DiarizationEvaluator(layout.ref("words"), layout.hyp(meeting_id, "asr_output.json"), meeting_id).evaluate()
+
+
+def _eval_topics(meeting_id: str, layout: CorpusLayout) -> dict:
+    from src.eval.topic_segmentation import TopicSegmentationEvaluator
+    return TopicSegmentationEvaluator(
+        ref_topic_path=layout.ref("topics", f"{meeting_id}.topic.xml"),
+        topic_map_path=layout.ref("topics", "topic_map.json"),
+        hyp_phrases_path=layout.hyp(meeting_id, "utterances.json"),
+        hyp_phases_path=layout.hyp(meeting_id, "phases.json"),
+        words_dir=layout.ref("words"),
+        meeting_id=meeting_id,
+    ).evaluate()
+
+
+def _eval_summary(meeting_id: str, layout: CorpusLayout) -> dict:
+    from src.eval.summary import SummaryEvaluator
+    return SummaryEvaluator(
+        ref_path=layout.ref("sum", f"{meeting_id}summ.txt"),
+        pred_path=layout.hyp(meeting_id, "summary.txt"),
+    ).evaluate()
+
+
+def evaluate_summaries(meetings: List[dict], layout: CorpusLayout, batch_size: int = 16):
+    """Score every meeting's summary in one batched pass, so the scorer models load only once."""
+    from src.eval.summary import SummaryScorer
+    predictions, references, scored = [], [], []
+    for meeting in meetings:
+        meeting_id = meeting["meeting_id"]
+        try:
+            with open(layout.ref("sum", f"{meeting_id}summ.txt"), "r") as f:
+                reference = f.read().strip()
+            with open(layout.hyp(meeting_id, "summary.txt"), "r") as f:
+                prediction = f.read().strip()
+        except OSError as e:
+            print(f"[EvalRunner] {meeting_id}: summary failed: {e!r}")
+            meeting["errors"]["summary"] = repr(e)
+            continue
+        predictions.append(prediction)
+        references.append(reference)
+        scored.append(meeting)
+
+    try:
+        scores = SummaryScorer(batch_size=batch_size).score(predictions, references)
+    except Exception as e:
+        print(f"[EvalRunner] Summary scoring failed: {e!r}")
+        for meeting in scored:
+            meeting["errors"]["summary"] = repr(e)
+        return
+    for meeting, result in zip(scored, scores):
+        meeting["results"]["summary"] = result
+
+
+def _eval_intent(meeting_id: str, layout: CorpusLayout) -> dict:
+    from src.eval.intent import IntentEvaluator
+    return IntentEvaluator(
+        words_dir=layout.ref("words"),
+        dialog_act_dir=layout.ref("dialogue_acts"),
+        intents_path=layout.hyp(meeting_id, "intents.json"),
+        intents_dict_path=layout.ref("intents", "intents_dict.json"),
+        hyp_utterances_path=layout.hyp(meeting_id, "utterances.json"),
+        meeting_id=meeting_id,
+    ).evaluate()
+
+
+EVALUATORS = {
+    "asr": _eval_asr,
+    "diarization": _eval_diarization,
+    "topics": _eval_topics,
+    "summary": _eval_summary,
+    "intent": _eval_intent,
+}
+
+
+def evaluate_meeting(meeting_id: str, ref_root: str, hyp_root: str, tasks: Iterable[str] = TASKS,
+                     allow_flat: bool = False) -> dict:
+    """Run the selected evaluators on one meeting; a failing task is recorded and the rest still run."""
+    layout = CorpusLayout(ref_root, hyp_root, allow_flat=allow_flat)
+    results, errors = {}, {}
+    for task in tasks:
+        try:
+            results[task] = EVALUATORS[task](meeting_id, layout)
+        except Exception as e:
+            print(f"[EvalRunner] {meeting_id}: {task} failed: {e!r}")
+            errors[task] = repr(e)
+    return {"meeting_id": meeting_id, "results": results, "errors": errors}
+
+
+# Raw counts returned next to the rates; they feed the micro averages and are not averaged themselves.
+COUNT_KEYS = {"word_errors", "ref_words", "char_errors", "ref_chars", "total", "confusion",
+              "missed_detection", "false_alarm", "windows", "support"}
+
+
+def _scalars(metrics: dict) -> Dict[str, float]:
+    return {k: v for k, v in metrics.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return numerator / denominator if denominator else None
+
+
+def _micro_asr(results: List[dict]) -> dict:
+    return {
+        "wer": _ratio(sum(r["word_errors"] for r in results), sum(r["ref_words"] for r in results)),
+        "cer": _ratio(sum(r["char_errors"] for r in results), sum(r["ref_chars"] for r in results)),
+    }
+
+
+def _micro_diarization(results: List[dict]) -> dict:
+    errors = sum(r["confusion"] + r["missed_detection"] + r["false_alarm"] for r in results)
+    return {"der": _ratio(errors, sum(r["total"] for r in results))}
+
+
+def _micro_topics(results: List[dict]) -> dict:
+    windows = sum(r["windows"] for r in results)
+    return {
+        "pk": _ratio(sum(r["pk"] * r["windows"] for r in results), windows),
+        "window_diff": _ratio(sum(r["window_diff"] * r["windows"] for r in results), windows),
+    }
+
+
+def _micro_intent(results: List[dict]) -> dict:
+    counts = {}
+    for r in results:
+        for label, c in r["counts"].items():
+            pooled = counts.setdefault(label, {"tp": 0, "fp": 0, "fn": 0})
+            for key in pooled:
+                pooled[key] += c[key]
+    f1 = [_ratio(2 * c["tp"], 2 * c["tp"] + c["fp"] + c["fn"]) or 0.0 for c in counts.values()]
+    tp = sum(c["tp"] for c in counts.values())
+    return {
+        "f1": _ratio(2 * tp, sum(2 * c["tp"] + c["fp"] + c["fn"] for c in counts.values())),
+        "macro_f1": float(np.mean(f1)) if f1 else None,
+        "support": sum(r["support"] for r in results),
+    }
+
+
+# Corpus-level metrics computed from pooled counts. Summary scores are per-pair averages either
+# way, so only their macro (per-meeting mean) is reported.
+MICRO = {
+    "asr": _micro_asr,
+    "diarization": _micro_diarization,
+    "topics": _micro_topics,
+    "intent": _micro_intent,
+}
+
+
+def aggregate(meetings: List[dict], tasks: Iterable[str] = TASKS) -> dict:
+    """Macro (mean over meetings) and micro (pooled) metrics per task."""
+    summary = {}
+    for task in tasks:
+        results = [m["results"][task] for m in meetings if task in m["results"]]
+        if not results:
+            summary[task] = {"meetings": 0}
+            continue
+        scalars = [_scalars(r) for r in results]
+        macro = {key: float(np.mean([s[key] for s in scalars])) for key in scalars[0] if key not in COUNT_KEYS}
+        summary[task] = {"meetings": len(results), "macro": macro}
+        if task in MICRO:
+            summary[task]["micro"] = MICRO[task](results)
+    return summary
+
+
+def write_csv(report: dict, path: str):
+    """One row per meeting plus MACRO/MICRO rows, with `<task>.<metric>` columns."""
+    rows = []
+    for meeting in report["meetings"]:
+        row = {"meeting_id": meeting["meeting_id"]}
+        for task, metrics in meeting["results"].items():
+            row.update({f"{task}.{k}": v for k, v in _scalars(metrics).items()})
+        rows.append(row)
+    for kind in ("macro", "micro"):
+        row = {"meeting_id": kind.upper()}
+        for task, agg in report["aggregate"].items():
+            row.update({f"{task}.{k}": v for k, v in agg.get(kind, {}).items()})
+        rows.append(row)
+
+    columns = ["meeting_id"]
+    for row in rows:
+        columns.extend(k for k in row if k not in columns)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+class CorpusEvaluator:
+    """Evaluates many meetings across a process pool and aggregates the metrics per task."""
+
+    def __init__(self, ref_root: str, hyp_root: str, tasks: Iterable[str] = TASKS, workers: int = 1,
+                 summary_batch_size: int = 16):
+        unknown = set(tasks) - set(TASKS)
+        if unknown:
+            raise ValueError(f"Unknown evaluation tasks: {sorted(unknown)}")
+        self.ref_root = ref_root
+        self.hyp_root = hyp_root
+        self.tasks = list(tasks)
+        self.workers = workers
+        self.summary_batch_size = summary_batch_size
+
+    def evaluate(self, meeting_ids: List[str], report_path: Optional[str] = None,
+                 csv_path: Optional[str] = None) -> dict:
+        start = time.perf_counter()
+        # Summaries are scored together in this process rather than one model load per worker.
+        tasks = [t for t in self.tasks if t != "summary"]
+        # Flat `hyp_root` outputs can only belong to a lone meeting.
+        allow_flat = len(meeting_ids) == 1
+        args = [(m, self.ref_root, self.hyp_root, tasks, allow_flat) for m in meeting_ids]
+        if self.workers > 1 and len(meeting_ids) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                meetings = list(pool.map(evaluate_meeting, *zip(*args)))
+        else:
+            meetings = [evaluate_meeting(*a) for a in args]
+        if "summary" in self.tasks:
+            evaluate_summaries(meetings, CorpusLayout(self.ref_root, self.hyp_root, allow_flat=allow_flat),
+                               self.summary_batch_size)
+
+        report = {
+            "ref_root": self.ref_root,
+            "hyp_root": self.hyp_root,
+            "tasks": self.tasks,
+            "wall_seconds": time.perf_counter() - start,
+            "aggregate": aggregate(meetings, self.tasks),
+            "meetings": meetings,
+        }
+        if report_path:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"[EvalRunner] Report written to {report_path}")
+        if csv_path:
+            write_csv(report, csv_path)
+            print(f"[EvalRunner] CSV written to {csv_path}")
+
+        failed = sum(1 for m in meetings if m["errors"])
+        print(f"[EvalRunner] Evaluated {len(meetings)} meetings ({failed} with errors) "
+              f"in {report['wall_seconds']:.1f}s")
+        return report
@@ -1,15 +1,39 @@
-import evaluate
+from typing import Dict, List, Optional
 from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
-from bert_score import score as bert_score
+from src.model_registry import get_model, model_lock
 
-class SummaryEvaluator:
-    def __init__(self, ref_path: str, pred_path: str):
-        with open(ref_path, "r") as f:
-            self.reference = f.read().strip()
-        with open(pred_path, "r") as f:
-            self.prediction = f.read().strip()
 
-    def compute_bleu(self, reference: str, prediction: str) -> float:
+def _load_rouge():
+    import evaluate
+    return evaluate.load("rouge")
+
+
+class SummaryScorer:
+    """ROUGE, BERTScore and BLEU for many (prediction, reference) pairs at once.
+
+    The ROUGE metric and the BERTScore model are loaded once per process through the model
+    registry, so every scorer (and every SummaryEvaluator) in a process shares them. BERTScore
+    embeds all pairs in batches of `batch_size`; identical sentences are only encoded once.
+    """
+
+    def __init__(self, lang: str = "en", model_type: Optional[str] = None, device: str = "cpu",
+                 batch_size: int = 16):
+        self.lang = lang
+        self.model_type = model_type
+        self.device = device
+        self.batch_size = batch_size
+
+    @property
+    def bert_key(self) -> tuple:
+        return ("bertscore", self.lang, self.model_type, self.device)
+
+    def _load_bert_scorer(self):
+        from bert_score import BERTScorer
+        return BERTScorer(lang=self.lang, model_type=self.model_type, device=self.device,
+                          batch_size=self.batch_size)
+
+    @staticmethod
+    def compute_bleu(reference: str, prediction: str) -> float:
         smoothie = SmoothingFunction().method4
         return sentence_bleu(
             [reference.split()],
@@ -17,23 +41,50 @@ class SummaryEvaluator:
             smoothing_function=smoothie
         )
 
-    def evaluate(self):
-        ref = self.reference
-        pred = self.prediction
+    def score(self, predictions: List[str], references: List[str]) -> List[Dict[str, float]]:
+        if len(predictions) != len(references):
+            raise ValueError("predictions and references must have the same length")
+        if not predictions:
+            return []
+
+        rouge = get_model(("rouge",), _load_rouge)
+        rouge_scores = rouge.compute(predictions=predictions, references=references, use_aggregator=False)
 
-        # ROUGE
-        rouge = evaluate.load("rouge")
-        rouge_scores = rouge.compute(predictions=[pred], references=[ref])
+        bert_scorer = get_model(self.bert_key, self._load_bert_scorer)
+        with model_lock(self.bert_key):
+            _, _, F1 = bert_scorer.score(predictions, references, batch_size=self.batch_size)
 
-        # BERTScore
-        P, R, F1 = bert_score([pred], [ref], lang="en", verbose=False)
+        return [
+            {
+                "rouge1": rouge_scores["rouge1"][i],
+                "rouge2": rouge_scores["rouge2"][i],
+                "rougeL": rouge_scores["rougeL"][i],
+                "bertscore_f1": F1[i].item(),
+                "bleu": self.compute_bleu(ref, pred),
+            }
+            for i, (pred, ref) in enumerate(zip(predictions, references))
+        ]
 
-        # BLEU
-        bleu_score = self.compute_bleu(ref, pred)
+
+class SummaryEvaluator:
+    def __init__(self, ref_path: str, pred_path: str, scorer: Optional[SummaryScorer] = None):
+        with open(ref_path, "r") as f:
+            self.reference = f.read().strip()
+        with open(pred_path, "r") as f:
+            self.prediction = f.read().strip()
+        self.scorer = scorer or SummaryScorer()
+
+    def compute_bleu(self, reference: str, prediction: str) -> float:
+        return SummaryScorer.compute_bleu(reference, prediction)
+
+    def evaluate(self):
+        scores = self.scorer.score([self.prediction], [self.reference])[0]
 
         print("\n[SUMMARY EVALUATION]")
-        print(f"ROUGE-1: {rouge_scores['rouge1']:.3f}")
-        print(f"ROUGE-2: {rouge_scores['rouge2']:.3f}")
-        print(f"ROUGE-L: {rouge_scores['rougeL']:.3f}")
-        print(f"BERTScore F1: {F1[0].item():.3f}")
-        print(f"BLEU: {bleu_score:.3f}")
+        print(f"ROUGE-1: {scores['rouge1']:.3f}")
+        print(f"ROUGE-2: {scores['rouge2']:.3f}")
+        print(f"ROUGE-L: {scores['rougeL']:.3f}")
+        print(f"BERTScore F1: {scores['bertscore_f1']:.3f}")
+        print(f"BLEU: {scores['bleu']:.3f}")
+
+        return scores
@@ -1,27 +1,15 @@
 import xml.etree.ElementTree as ET
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional
 from sklearn.metrics import f1_score, precision_score, recall_score
 from nltk.metrics.distance import edit_distance
 import numpy as np
-import os
 import re
+from src.eval.corpus import load_words
 
 
-def load_word_times(words_dir: str) -> Dict[str, Dict[str, float]]:
-    word_times = {}
-    for fname in os.listdir(words_dir):
-        if not fname.endswith(".words.xml"):
-            continue
-        tree = ET.parse(os.path.join(words_dir, fname))
-        root = tree.getroot()
-        for w in root.findall(".//w"):
-            wid = w.attrib.get("{http://nite.sourceforge.net/}id")
-            start = float(w.attrib.get("starttime", -1))
-            end = float(w.attrib.get("endtime", -1))
-            if wid and start >= 0 and end >= 0:
-                word_times[wid] = {"start": start, "end": end}
-    return word_times
+def load_word_times(words_dir: str, meeting_id: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    return load_words(words_dir, meeting_id).times_by_id()
 
 
 def parse_topic_segments(xml_path: str, word_times: Dict[str, Dict[str, float]]) -> List[Dict]:
@@ -61,40 +49,51 @@ def parse_topic_segments(xml_path: str, word_times: Dict[str, Dict[str, float]])
 
 
 
-def get_boundaries_binary(timeline: List[float], segments: List[Dict]) -> List[int]:
-    boundaries = [0] * len(timeline)
-    for seg in segments:
-        end_time = seg["end"]
-        for i, t in enumerate(timeline):
-            if abs(t - end_time) < 0.25:
-                boundaries[i] = 1
-                break
+def get_boundaries_binary(timeline: List[float], segments: List[Dict], tolerance: float = 0.25) -> np.ndarray:
+    """Mark, for each segment end, the first timeline point within `tolerance` of it."""
+    timeline = np.asarray(timeline, dtype=np.float64)
+    boundaries = np.zeros(len(timeline), dtype=np.int64)
+    if not segments or not len(timeline):
+        return boundaries
+    ends = np.array([seg["end"] for seg in segments], dtype=np.float64)
+    idx = np.searchsorted(timeline, ends - tolerance, side="right")
+    inside = idx < len(timeline)
+    idx, ends = idx[inside], ends[inside]
+    hit = np.abs(timeline[idx] - ends) < tolerance
+    boundaries[idx[hit]] = 1
     return boundaries
 
 
+def window_sums(bounds, k: int) -> np.ndarray:
+    """Number of boundaries in bounds[i:i + k] for every i in range(len(bounds) - k)."""
+    cumsum = np.concatenate(([0], np.cumsum(np.asarray(bounds, dtype=np.int64))))
+    n = len(cumsum) - 1
+    return cumsum[k:n] - cumsum[:max(0, n - k)]
+
+
 def pk(true: List[int], pred: List[int], k: int) -> float:
-    errors = 0
     total = len(true) - k
-    for i in range(total):
-        ref_same = sum(true[i:i + k]) == 0
-        hyp_same = sum(pred[i:i + k]) == 0
-        if ref_same != hyp_same:
-            errors += 1
+    errors = int(np.count_nonzero((window_sums(true, k) == 0) != (window_sums(pred, k) == 0)))
     return errors / total
 
 
 def window_diff(true: List[int], pred: List[int], k: int) -> float:
-    errors = 0
     total = len(true) - k
-    for i in range(total):
-        if abs(sum(true[i:i + k]) - sum(pred[i:i + k])) > 0:
-            errors += 1
+    errors = int(np.count_nonzero(window_sums(true, k) != window_sums(pred, k)))
     return errors / total
 
 
+def coverage(true: List[int], pred: List[int], k: int) -> float:
+    """Share of k-wide windows that contain at least one predicted boundary."""
+    total = len(true) - k
+    return int(np.count_nonzero(window_sums(pred, k)[:max(0, total)] > 0)) / total
+
+
 class TopicSegmentationEvaluator:
-    def __init__(self, ref_topic_path: str, topic_map_path: str, hyp_phrases_path: str, hyp_phases_path: str, words_dir: str):
-        word_times = load_word_times(words_dir)
+    def __init__(self, ref_topic_path: str, topic_map_path: str, hyp_phrases_path: str, hyp_phases_path: str, words_dir: str,
+                 resolution: float = 0.5, meeting_id: Optional[str] = None):
+        self.resolution = resolution
+        word_times = load_word_times(words_dir, meeting_id)
         self.ref_segments = parse_topic_segments(ref_topic_path, word_times)
         with open(topic_map_path, "r") as f:
             self.topic_map = json.load(f)
@@ -134,23 +133,24 @@ class TopicSegmentationEvaluator:
 
         # Time boundaries setup
         max_time = max(p["end"] for p in self.hyp_phrases)
-        timeline = np.arange(0, max_time, 0.5).tolist()
+        timeline = np.arange(0, max_time, self.resolution)
+        tolerance = self.resolution / 2
 
-        ref_bounds = get_boundaries_binary(timeline, self.ref_segments)
+        ref_bounds = get_boundaries_binary(timeline, self.ref_segments, tolerance)
         hyp_bounds = get_boundaries_binary(timeline, [
             {
                 "start": self.hyp_phrases[p["start_id"]]["start"],
                 "end": self.hyp_phrases[p["end_id"]]["end"]
             } for p in self.hyp_phases
-        ])
+        ], tolerance)
 
-        k = max(1, int(np.mean([seg["end"] - seg["start"] for seg in self.ref_segments]) / 0.5))
+        k = max(1, int(np.mean([seg["end"] - seg["start"] for seg in self.ref_segments]) / self.resolution))
         pk_score = pk(ref_bounds, hyp_bounds, k)
         wd_score = window_diff(ref_bounds, hyp_bounds, k)
         f1 = f1_score(ref_bounds, hyp_bounds)
         precision = precision_score(ref_bounds, hyp_bounds)
         recall = recall_score(ref_bounds, hyp_bounds)
-        coverage = sum([any(hyp_bounds[i:i + k]) for i in range(0, len(ref_bounds) - k)]) / (len(ref_bounds) - k)
+        coverage_score = coverage(ref_bounds, hyp_bounds, k)
 
         print("[TOPIC SEGMENTATION EVAL]")
         print(f"Label Accuracy: {acc:.3f}")
@@ -159,5 +159,17 @@ class TopicSegmentationEvaluator:
         print(f"P_k: {pk_score:.3f}")
         print(f"WindowDiff: {wd_score:.3f}")
         print(f"F1-score: {f1:.3f} (P: {precision:.3f}, R: {recall:.3f})")
-        print(f"Coverage: {coverage:.3f}")
+        print(f"Coverage: {coverage_score:.3f}")
+
+        return {
+            "label_accuracy": acc,
+            "levenshtein": float(avg_lev),
+            "pk": pk_score,
+            "window_diff": wd_score,
+            "f1": float(f1),
+            "precision": float(precision),
+            "recall": float(recall),
+            "coverage": coverage_score,
+            "windows": len(ref_bounds) - k,
+        }
 
@@ -1,28 +1,89 @@
+import re
+from typing import Optional
 from src.llm_client import LLMClient
 
+INTENT_LABELS = [
+    "Backchannel", "Stall", "Fragment", "Inform", "Suggest", "Assess", "Elicit-Inform",
+    "Elicit-Offer-Or-Suggestion", "Elicit-Assessment", "Elicit-Comment-Understanding", "Offer",
+    "Comment-About-Understanding", "Be-Positive", "Be-Negative", "Other",
+]
+_LABELS_BY_KEY = {label.lower(): label for label in INTENT_LABELS}
+_BATCH_LINE = re.compile(r"^\W*(\d+)\W*\|\s*([A-Za-z-]+)")
+
 
 class IntentDetector:
-    def __init__(self, llm_client: LLMClient, prompt_path: str = "src/prompts/intent_detection.txt"):
+    def __init__(self, llm_client: LLMClient, prompt_path: str = "src/prompts/intent_detection.txt",
+                 max_concurrency: Optional[int] = None, batch_size: int = 1,
+                 batch_prompt_path: str = "src/prompts/intent_detection_batch.txt"):
         self.llm = llm_client
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
         with open(prompt_path, "r", encoding="utf-8") as f:
             self.prompt_template = f.read()
+        if batch_size > 1:
+            with open(batch_prompt_path, "r", encoding="utf-8") as f:
+                self.batch_prompt_template = f.read()
+
+    def build_prompt(self, utterances: list[dict], i: int) -> str:
+        context_utts = utterances[max(0, i - 5): i]
+        context = "\n".join(f"{u['speaker']}: {u['text'].strip()}" for u in context_utts)
+        utt = utterances[i]
+        target = f"{utt['speaker']}: {utt['text'].strip()}"
+        return self.prompt_template.replace("{context}", context).replace("{target}", target)
+
+    def build_batch_prompt(self, utterances: list[dict], start: int, end: int) -> str:
+        context_utts = utterances[max(0, start - 5): start]
+        context = "\n".join(f"{u['speaker']}: {u['text'].strip()}" for u in context_utts)
+        targets = "\n".join(f"[{u['id']}] {u['speaker']}: {u['text'].strip()}" for u in utterances[start:end])
+        return self.batch_prompt_template.replace("{context}", context).replace("{targets}", targets)
+
+    @staticmethod
+    def parse_batch_response(response: str, expected_ids: list) -> dict:
+        expected = set(expected_ids)
+        intents = {}
+        for line in response.strip().splitlines():
+            match = _BATCH_LINE.match(line.strip())
+            if not match:
+                continue
+            uid, label = int(match.group(1)), _LABELS_BY_KEY.get(match.group(2).lower())
+            if uid in expected and label and uid not in intents:
+                intents[uid] = label
+        return intents
+
+    def detect_batched(self, utterances: list[dict]) -> list[str]:
+        bounds = [(s, min(s + self.batch_size, len(utterances))) for s in range(0, len(utterances), self.batch_size)]
+        requests = [(self.build_batch_prompt(utterances, s, e), "") for s, e in bounds]
+        responses = self.llm.call_many(requests, max_concurrency=self.max_concurrency)
+
+        intents = [None] * len(utterances)
+        for (start, end), response in zip(bounds, responses):
+            parsed = self.parse_batch_response(response, [u["id"] for u in utterances[start:end]])
+            for i in range(start, end):
+                intents[i] = parsed.get(utterances[i]["id"])
+
+        missing = [i for i, intent in enumerate(intents) if intent is None]
+        if missing:
+            print(f"[IntentDetector] {len(missing)} utterances missing from batch responses, retrying one by one")
+            retried = self.llm.call_many([(self.build_prompt(utterances, i), "") for i in missing],
+                                         max_concurrency=self.max_concurrency)
+            for i, intent in zip(missing, retried):
+                intents[i] = intent
+        return intents
 
     def detect(self, utterances: list[dict]) -> list[dict]:
-        results = []
-        for i, utt in enumerate(utterances):
-            context_utts = utterances[max(0, i - 5): i]
-            context = "\n".join(f"{u['speaker']}: {u['text'].strip()}" for u in context_utts)
-            target = f"{utt['speaker']}: {utt['text'].strip()}"
-
-            prompt = self.prompt_template.replace("{context}", context).replace("{target}", target)
-            intent = self.llm.call(prompt, "")
-            results.append({
+        if self.batch_size > 1:
+            intents = self.detect_batched(utterances)
+        else:
+            requests = [(self.build_prompt(utterances, i), "") for i in range(len(utterances))]
+            intents = self.llm.call_many(requests, max_concurrency=self.max_concurrency)
+        print(f"[IntentDetector] Classified {len(intents)} utterances")
+
+        return [
+            {
                 "id": utt["id"],
                 "speaker": utt["speaker"],
                 "text": utt["text"],
                 "intent": intent.strip()
-            })
-            print(i, end="\r")
-        print()
-        return results
-
+            }
+            for utt, intent in zip(utterances, intents)
+        ]
@@ -1,20 +1,128 @@
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
 import openai
 
+from src.llm_cache import ResponseCache
+from src.telemetry import record_llm_call
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
 class LLMClient:
-    def __init__(self, api_key: str, model: str = "gpt-4o"):
-        self.client = openai.OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4o",
+        base_url: Optional[str] = None,
+        max_concurrency: int = 8,
+        requests_per_second: Optional[float] = None,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        temperature: float = 0.3,
+        cache_path: Optional[str] = None,
+        cache_max_bytes: int = 512 * 1024 * 1024,
+        use_cache: bool = True,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = None
+        self._client_lock = threading.Lock()
         self.model = model
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = TokenBucket(requests_per_second) if requests_per_second else None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.temperature = temperature
+        self.cache = ResponseCache(cache_path, max_bytes=cache_max_bytes) if cache_path else None
+        self.use_cache = use_cache
+
+    @property
+    def client(self) -> openai.OpenAI:
+        with self._client_lock:
+            if self._client is None:
+                # Retries are handled here so that they also go through the rate limiter.
+                self._client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        return self._client
+
+    def call(self, prompt: str, input_text: str, use_cache: Optional[bool] = None) -> str:
+        use_cache = self.cache is not None and (self.use_cache if use_cache is None else use_cache)
+        if use_cache:
+            key = ResponseCache.make_key(self.model, self.temperature, prompt, input_text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                record_llm_call(self.model, 0.0, cached=True)
+                return cached
 
-    def call(self, prompt: str, input_text: str) -> str:
         messages = [
             {"role": "system", "content": prompt},
             {"role": "user", "content": input_text}
         ]
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=0.3
-        )
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature
+                )
+                break
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2 ** attempt * (1 + random.random())
+                print(f"[LLMClient] {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+        usage = response.usage
+        record_llm_call(self.model, time.perf_counter() - started,
+                        prompt_tokens=usage.prompt_tokens if usage else 0,
+                        completion_tokens=usage.completion_tokens if usage else 0)
+
+        content = response.choices[0].message.content.strip()
+        if use_cache:
+            self.cache.put(key, content)
+        return content
 
-        return response.choices[0].message.content.strip()
+    def call_many(self, requests: List[Tuple[str, str]], max_concurrency: Optional[int] = None) -> List[str]:
+        """Run several (prompt, input_text) calls concurrently; results keep the order of `requests`."""
+        workers = max_concurrency or self.max_concurrency
+        if workers <= 1 or len(requests) <= 1:
+            return [self.call(prompt, input_text) for prompt, input_text in requests]
+        # Workers inherit the caller's context so telemetry knows which run and stage a call belongs to.
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=min(workers, len(requests))) as pool:
+            return list(pool.map(lambda r: context.copy().run(self.call, *r), requests))
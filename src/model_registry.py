@@ -0,0 +1,35 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+_models: Dict[Hashable, Any] = {}
+_locks: Dict[Hashable, threading.Lock] = {}
+_inference_locks: Dict[Hashable, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def get_model(key: Hashable, loader: Callable[[], Any]) -> Any:
+    """Return the process-wide instance for `key`, calling `loader` the first time it is needed."""
+    if key in _models:
+        return _models[key]
+    with _registry_lock:
+        lock = _locks.setdefault(key, threading.Lock())
+    # Per-key lock: concurrent callers wait for one load, while other models load in parallel.
+    with lock:
+        if key not in _models:
+            print(f"[ModelRegistry] Loading {key}...")
+            _models[key] = loader()
+    return _models[key]
+
+
+def model_lock(key: Hashable) -> threading.Lock:
+    """Lock serializing inference on one shared model when several pipelines run at once."""
+    with _registry_lock:
+        return _inference_locks.setdefault(key, threading.Lock())
+
+
+def unload(key: Hashable = None):
+    with _registry_lock:
+        if key is None:
+            _models.clear()
+        else:
+            _models.pop(key, None)
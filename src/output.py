@@ -0,0 +1,121 @@
+import gzip
+import json
+import re
+from typing import IO, Iterator, Optional
+
+NDJSON_FORMAT = "accp-meeting-ndjson"
+NDJSON_VERSION = 1
+
+_FENCED_JSON = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+
+def parse_speaker_info(speaker_info):
+    """Speaker info as a dict, recovering JSON the extractor could not parse (e.g. inside a ``` fence)."""
+    if not (isinstance(speaker_info, dict) and "raw_response" in speaker_info):
+        return speaker_info
+    raw = speaker_info["raw_response"]
+    fenced = _FENCED_JSON.search(raw)
+    try:
+        return json.loads(fenced.group(1) if fenced else raw)
+    except json.JSONDecodeError:
+        print("[Output] Could not parse speaker info, keeping the raw response.")
+        return speaker_info
+
+
+def assemble_final_output(summary: str, phases: list[dict], text: str, speaker_info: dict,
+                          intents: list[dict], utterances: list[dict]) -> dict:
+    intent_map = {item["id"]: item["intent"] for item in intents}
+
+    final_utterances = []
+    for idx, seg in enumerate(utterances):
+        uid = seg.get("id", idx)
+        final_utterances.append({
+            "id": uid,
+            "start": seg["start"],
+            "end": seg["end"],
+            "text": seg["text"],
+            "speaker": seg.get("speaker", "unknown"),
+            "segment_ids": [uid],
+            "intent": intent_map.get(uid, "unknown")
+        })
+
+    return {
+        "summary": summary.strip(),
+        "conversation_phases": phases,
+        "text": text,
+        "speakers_info": parse_speaker_info(speaker_info),
+        "utterances": final_utterances
+    }
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_json(final_output: dict, path: str, indent: Optional[int] = 2):
+    with _open(path, "w") as f:
+        json.dump(final_output, f, ensure_ascii=False, indent=indent)
+
+
+def write_ndjson(final_output: dict, path: str):
+    """Write a final output as one header line followed by one line per utterance (gzipped if path ends in .gz).
+
+    The header holds everything except the utterances, plus their count.
+    """
+    header = {key: value for key, value in final_output.items() if key != "utterances"}
+    header = {"format": NDJSON_FORMAT, "version": NDJSON_VERSION,
+              "num_utterances": len(final_output["utterances"]), **header}
+    with _open(path, "w") as f:
+        f.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")) + "\n")
+        for utterance in final_output["utterances"]:
+            f.write(json.dumps(utterance, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+class MeetingReader:
+    """Lazy reader for NDJSON outputs: the header is read up front, utterances one line at a time.
+
+        with MeetingReader("outputs/final_output.ndjson.gz") as reader:
+            print(reader.header["summary"])
+            for utterance in reader:
+                ...
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[IO[str]] = _open(path, "r")
+        self.header = json.loads(self._file.readline())
+        if self.header.get("format") != NDJSON_FORMAT:
+            self.close()
+            raise ValueError(f"{path} is not a {NDJSON_FORMAT} file")
+
+    def __iter__(self) -> Iterator[dict]:
+        if self._file is None:
+            raise ValueError("reader is closed")
+        for line in self._file:
+            if line.strip():
+                yield json.loads(line)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_final_output(path: str) -> dict:
+    """Load a final output written either as JSON or as NDJSON, in the JSON layout."""
+    if not path.endswith((".ndjson", ".ndjson.gz")):
+        with _open(path, "r") as f:
+            return json.load(f)
+    with MeetingReader(path) as reader:
+        final_output = {key: value for key, value in reader.header.items()
+                        if key not in ("format", "version", "num_utterances")}
+        final_output["utterances"] = list(reader)
+    return final_output
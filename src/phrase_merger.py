@@ -1,5 +1,5 @@
 import re
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List
 
 class PhraseMerger:
     @staticmethod
@@ -18,40 +18,48 @@ class PhraseMerger:
 
     @staticmethod
     def merge_segments(segments: List[Dict]) -> List[Dict]:
-        if not segments:
-            return []
-
-        merged = []
-        first = segments[0]
-        current = {
-            "id": 0,
-            "start": first["start"],
-            "end": first["end"],
-            "text": PhraseMerger.clean_text(first["text"]),
-            "speaker": first.get("speaker", "unknown"),
-            "segment_ids": [first.get("id", 0)]
-        }
-        phrase_id = 1
-
-        for seg in segments[1:]:
+        return list(PhraseMerger.iter_merge(segments))
+
+    @staticmethod
+    def iter_merge(segments: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield each utterance as soon as the next segment shows it is complete.
+
+        Text is kept as a list of cleaned fragments and joined once per utterance, so merging
+        stays linear in the total text length however long a monologue gets.
+        """
+        current = None
+        fragments = []
+        last_fragment = ""
+        phrase_id = 0
+
+        for seg in segments:
             cleaned_text = PhraseMerger.clean_text(seg["text"])
-            seg_with_clean_text = {**seg, "text": cleaned_text}
+            speaker = seg.get("speaker", "unknown")
 
-            if PhraseMerger.should_merge(current, seg_with_clean_text):
+            if (current is not None and speaker != "unknown" and current["speaker"] != "unknown"
+                    and speaker == current["speaker"] and not last_fragment.endswith(('.', '!', '?'))):
                 current["end"] = seg["end"]
-                current["text"] = PhraseMerger.clean_text(current["text"] + " " + cleaned_text)
                 current["segment_ids"].append(seg.get("id", -1))
             else:
-                merged.append(current)
+                if current is not None:
+                    current["text"] = " ".join(fragments)
+                    yield current
                 current = {
                     "id": phrase_id,
                     "start": seg["start"],
                     "end": seg["end"],
-                    "text": cleaned_text,
-                    "speaker": seg.get("speaker", "unknown"),
-                    "segment_ids": [seg.get("id", -1)]
+                    "text": "",
+                    "speaker": speaker,
+                    "segment_ids": [seg.get("id", 0 if phrase_id == 0 else -1)]
                 }
+                fragments = []
+                last_fragment = ""
                 phrase_id += 1
 
-        merged.append(current)
-        return merged
+            if cleaned_text:
+                fragments.append(cleaned_text)
+                last_fragment = cleaned_text
+
+        if current is not None:
+            current["text"] = " ".join(fragments)
+            yield current
@@ -1,133 +1,320 @@
 import json
-from src.asr import WhisperASR
-from src.diarizer import SpeakerDiarizer
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Iterable
+from src.asr import create_asr, default_device
+from src.audio import SharedAudio
+from src.batch import audio_duration, collect_audio_files, meeting_ids
+from src.checkpoint import Checkpointer
+from src.diarizer import DIARIZATION_MODEL, SpeakerDiarizer, load_rttm, save_rttm
 from src.phrase_merger import PhraseMerger
+from src.scheduler import Stage, StageScheduler
+from src.speaker_attribution import annotation_turns, attribute_speakers, iter_attributed
 from src.topic_segmenter import TopicSegmenter
 from src.summary import MeetingSummarizer
 from src.llm_client import LLMClient
 from src.intent_detection import IntentDetector
 from src.speaker_info import SpeakerInfoExtractor
+from src.telemetry import Telemetry
+from src.vad import annotation_speech_regions, energy_speech_regions
+from src.output import assemble_final_output, load_final_output, write_json, write_ndjson
+
+OUTPUT_FORMATS = ("json", "ndjson")
+VAD_SOURCES = ("energy", "diarization")
+
+
+def load_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
 
 class Pipeline:
-    def __init__(self, hf_token: str, openai_api_key: str, model_size="small", device="cuda", save_path="outputs"):
-        self.asr = WhisperASR(model_size=model_size, device=device)
-        self.diarizer = SpeakerDiarizer(hf_token=hf_token, device=device)
-        self.llm = LLMClient(api_key=openai_api_key)
-        self.topic_segmenter = TopicSegmenter(llm_client=self.llm)
-        self.summarizer = MeetingSummarizer(llm_client=self.llm)
-        self.intent_detector = IntentDetector(llm_client=self.llm)
+    def __init__(self, hf_token: str, openai_api_key: str, model_size="small", device=None, save_path="outputs",
+                 intent_batch_size: int = 1, llm_cache_path: str = None, parallel: bool = True,
+                 resume: bool = True, streaming: bool = False, stream_window: float = 30.0,
+                 stream_overlap: float = 5.0, on_utterance: Callable[[dict], None] = None,
+                 summary_chunk_tokens: int = 8000, topic_window_size: int = None, topic_window_overlap: int = None,
+                 metrics_exporter: Callable[[dict], None] = None, output_format: str = "json",
+                 gzip_output: bool = False, vad: str = None, asr_engine: str = "whisper",
+                 asr_options: dict = None, diarization_cache_dir: str = None, num_speakers: int = None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}")
+        if vad is not None and vad not in VAD_SOURCES:
+            raise ValueError(f"vad must be None or one of {VAD_SOURCES}")
+        device = device or default_device(asr_engine)
+        self.asr = create_asr(asr_engine, model_size=model_size, device=device, **(asr_options or {}))
+        self.diarizer = SpeakerDiarizer(hf_token=hf_token, device=device, cache_dir=diarization_cache_dir,
+                                        num_speakers=num_speakers)
+        self.llm = LLMClient(api_key=openai_api_key, cache_path=llm_cache_path)
+        self.topic_segmenter = TopicSegmenter(llm_client=self.llm, window_size=topic_window_size,
+                                              window_overlap=topic_window_overlap)
+        self.summarizer = MeetingSummarizer(llm_client=self.llm, chunk_tokens=summary_chunk_tokens)
+        self.intent_detector = IntentDetector(llm_client=self.llm, batch_size=intent_batch_size)
         self.speaker_info_extractor = SpeakerInfoExtractor(llm_client=self.llm)
         self.save_path = save_path
+        self.resume = resume
+        self.streaming = streaming
+        self.stream_window = stream_window
+        self.stream_overlap = stream_overlap
+        self.on_utterance = on_utterance
+        self.metrics_exporter = metrics_exporter
+        self.output_format = output_format
+        self.gzip_output = gzip_output
+        # Speech regions for Whisper: "energy" runs a CPU pre-pass, "diarization" reuses pyannote's
+        # output (ASR then waits for diarization instead of running alongside it).
+        self.vad = vad
+        # The compact format also drops the indentation of the intermediate JSON artifacts.
+        self.json_indent = 2 if output_format == "json" else None
+        self.scheduler = StageScheduler(parallel=parallel)
+
+    def build_stages(self, audio_path: str, save_path: str, checkpointer: Checkpointer = None) -> list[Stage]:
+        audio = {"audio": checkpointer.source_digest(audio_path)} if checkpointer else {}
+        # Decoded at most once, by whichever of ASR and diarization runs first.
+        shared_audio = SharedAudio(audio_path)
+        llm = {"model": self.llm.model, "temperature": self.llm.temperature}
+        intent_prompts = [self.intent_detector.prompt_template, getattr(self.intent_detector, "batch_prompt_template", None)]
+        stages = [
+            Stage("asr", partial(self.transcribe, shared_audio, save_path), kind="model",
+                  deps=("diarization",) if self.vad == "diarization" else (),
+                  artifact="transcript.json", load=load_json,
+                  config={**audio, **self.asr.config, "vad": self.vad}),
+            Stage("diarization", partial(self.diarize, shared_audio, save_path), kind="model",
+                  artifact="diarization.rttm", load=load_rttm,
+                  config={**audio, "model": DIARIZATION_MODEL, **self.diarizer.speaker_options,
+                          **({"speech_regions": True} if self.vad == "diarization" else {})}),
+            Stage("attribution", partial(self.attribute_speakers, save_path=save_path), deps=("asr", "diarization"),
+                  artifact="asr_output.json", load=load_json),
+            Stage("utterances", partial(self.merge_phrases, save_path=save_path), deps=("attribution",),
+                  artifact="utterances.json", load=load_json),
+            Stage("phases", partial(self.segment_topics, save_path=save_path), deps=("utterances",),
+                  artifact="phases.json", load=load_json,
+                  config={**llm, "prompt": self.topic_segmenter.prompt,
+                          "window": [self.topic_segmenter.window_size, self.topic_segmenter.window_overlap]}),
+            Stage("summary", partial(self.summarize, save_path=save_path), deps=("utterances",),
+                  artifact="summary.txt", load=load_json,
+                  config={**llm, "prompt": [self.summarizer.prompt, self.summarizer.chunk_prompt,
+                                            self.summarizer.reduce_prompt],
+                          "chunk_tokens": self.summarizer.chunk_tokens}),
+            Stage("intents", partial(self.detect_intents, save_path=save_path), deps=("utterances",),
+                  artifact="intents.json", load=load_json,
+                  config={**llm, "prompt": intent_prompts, "batch_size": self.intent_detector.batch_size}),
+            Stage("speaker_info", partial(self.extract_speaker_info, save_path=save_path), deps=("utterances",),
+                  artifact="speaker_info.json", load=load_json,
+                  config={**llm, "prompt": self.speaker_info_extractor.prompt}),
+            Stage("final_output", partial(self.assemble, save_path=save_path),
+                  deps=("attribution", "utterances", "phases", "summary", "intents", "speaker_info"),
+                  artifact=self.final_output_name, load=load_final_output),
+        ]
+        if self.streaming:
+            stages = [stage for stage in stages if stage.name not in ("asr", "attribution", "utterances")]
+            stages[1:1] = [
+                Stage("utterances", partial(self.stream_utterances, shared_audio, save_path), deps=("diarization",),
+                      kind="model", artifact="utterances.json", load=load_json,
+                      config={**audio, **self.asr.config,
+                              "window": self.stream_window, "overlap": self.stream_overlap}),
+                Stage("attribution", lambda utterances: load_json(save_path + "/asr_output.json"),
+                      deps=("utterances",), artifact="asr_output.json", load=load_json),
+            ]
+        if checkpointer:
+            stages = [checkpointer.wrap(stage) for stage in stages]
+        return stages
+
+    @staticmethod
+    def track_progress(stage: Stage, on_stage: Callable[[str, str], None]) -> Stage:
+        """Report "running", then "done" or "failed", for a stage."""
+        def run(**deps):
+            on_stage(stage.name, "running")
+            try:
+                result = stage.fn(**deps)
+            except Exception:
+                on_stage(stage.name, "failed")
+                raise
+            on_stage(stage.name, "done")
+            return result
+
+        return Stage(stage.name, run, deps=stage.deps, kind=stage.kind)
+
+    def run(self, audio_path: str, force: Iterable[str] = (), save_path: str = None,
+            on_stage: Callable[[str, str], None] = None) -> dict:
+        save_path = save_path or self.save_path
+        os.makedirs(save_path, exist_ok=True)
+        checkpointer = Checkpointer(save_path, force=force) if self.resume else None
+        telemetry = Telemetry(exporter=self.metrics_exporter)
+        stages = [telemetry.wrap(stage) for stage in self.build_stages(audio_path, save_path, checkpointer)]
+        if on_stage:
+            for stage in stages:
+                on_stage(stage.name, "pending")
+            stages = [self.track_progress(stage, on_stage) for stage in stages]
+        with telemetry.activate():
+            results = self.scheduler.run(stages)
+        metrics = telemetry.save(save_path + "/metrics.json")
+        print(f"[Pipeline] Done in {metrics['wall_seconds']:.1f}s, {metrics['llm']['calls']} LLM calls, "
+              f"{metrics['llm']['prompt_tokens']} prompt / {metrics['llm']['completion_tokens']} completion tokens")
+        if self.llm.cache:
+            stats = self.llm.cache.stats()
+            print(f"[Pipeline] LLM cache: {stats['hits']} hits, {stats['misses']} misses")
+        return results["final_output"]
+
+    def run_many(self, source, output_root: str = None, max_meetings: int = 2,
+                 force: Iterable[str] = ()) -> dict:
+        """Process a directory or manifest of recordings into per-meeting folders under output_root.
+
+        Meetings run concurrently; Whisper and pyannote are shared and used by one meeting at a time,
+        so one meeting's LLM stages overlap with the next meeting's model stages.
+        """
+        audio_paths = collect_audio_files(source) if isinstance(source, str) else list(source)
+        output_root = output_root or self.save_path
+        ids = meeting_ids(audio_paths)
+
+        def process(meeting_id: str, audio_path: str) -> dict:
+            started = time.perf_counter()
+            entry = {"meeting_id": meeting_id, "audio_path": audio_path, "audio_seconds": None}
+            try:
+                entry["audio_seconds"] = audio_duration(audio_path)
+            except Exception as e:
+                # Only the throughput report needs the duration; the meeting still runs.
+                print(f"[Pipeline] {meeting_id}: could not read the duration: {e!r}")
+            try:
+                self.run(audio_path, force=force, save_path=os.path.join(output_root, meeting_id))
+                entry["status"] = "ok"
+            except Exception as e:
+                print(f"[Pipeline] {meeting_id} failed: {e!r}")
+                entry["status"] = "failed"
+                entry["error"] = repr(e)
+            entry["wall_seconds"] = time.perf_counter() - started
+            return entry
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_meetings, thread_name_prefix="meeting") as pool:
+            meetings = list(pool.map(process, ids, audio_paths))
+        wall_seconds = time.perf_counter() - started
+
+        audio_seconds = sum(m["audio_seconds"] or 0.0 for m in meetings if m["status"] == "ok")
+        report = {
+            "meetings": meetings,
+            "succeeded": sum(m["status"] == "ok" for m in meetings),
+            "failed": sum(m["status"] != "ok" for m in meetings),
+            "audio_hours": audio_seconds / 3600,
+            "wall_hours": wall_seconds / 3600,
+            "audio_hours_per_hour": audio_seconds / wall_seconds if wall_seconds > 0 else 0.0,
+        }
+        with open(os.path.join(output_root, "run_report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[Pipeline] Processed {report['succeeded']}/{len(meetings)} meetings, "
+              f"{report['audio_hours']:.2f} h of audio in {report['wall_hours']:.2f} h "
+              f"({report['audio_hours_per_hour']:.1f} h audio / h)")
+        return report
 
-    def run(self, audio_path: str) -> dict:
+    @property
+    def final_output_name(self) -> str:
+        name = "final_output." + self.output_format
+        return name + ".gz" if self.gzip_output else name
+
+    def save_json(self, obj, path: str, pretty: bool = True):
+        indent = self.json_indent if pretty else None
+        separators = (",", ":") if indent is None else None
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=indent, separators=separators)
+
+    def transcribe(self, audio: SharedAudio, save_path: str, diarization=None) -> dict:
         print("[Pipeline] Step 1: Transcribing...")
-        asr_result = self.asr.transcribe(audio_path)
+        if self.vad == "diarization":
+            transcript = self.asr.transcribe_regions(audio, load_json(save_path + "/speech_regions.json"))
+        elif self.vad == "energy":
+            transcript = self.asr.transcribe_regions(audio, energy_speech_regions(audio.samples, audio.sr))
+        else:
+            transcript = self.asr.transcribe(audio)
+        self.save_json(transcript, save_path + "/transcript.json", pretty=False)
+        return transcript
 
+    def diarize(self, audio: SharedAudio, save_path: str):
         print("[Pipeline] Step 2: Diarizing...")
-        diarization = self.diarizer.diarize(audio_path)
+        diarization, offset = self.diarizer.diarize_with_offset(audio)
+        save_rttm(diarization, save_path + "/diarization.rttm")
+        if self.vad == "diarization":
+            # Written next to the RTTM, which is shifted by the offset; these are on the audio's own timeline.
+            regions = annotation_speech_regions(diarization, offset=offset, duration=audio.duration)
+            self.save_json(regions, save_path + "/speech_regions.json")
+        return diarization
+
+    def attribute_speakers(self, asr: dict, diarization, save_path: str) -> dict:
         print("[Pipeline] Step 3: Merging speaker labels...")
-        for segment in asr_result["segments"]:
-            start, end = segment["start"], segment["end"]
-            for turn, _, speaker in diarization.itertracks(yield_label=True):
-                if turn.start <= start < turn.end or turn.start < end <= turn.end:
-                    segment["speaker"] = speaker
-                    break
-            else:
-                segment["speaker"] = "unknown"
+        attribute_speakers(asr["segments"], annotation_turns(diarization))
+        self.save_json(asr, save_path + "/asr_output.json")
+        return asr
 
-        with open(self.save_path + "/asr_output.json", "w", encoding="utf-8") as f:
-            json.dump(asr_result, f, ensure_ascii=False, indent=2)
+    def merge_phrases(self, attribution: dict, save_path: str) -> list[dict]:
+        print("[Pipeline] Step 4: Merging phrases...")
+        utterances = PhraseMerger.merge_segments(attribution["segments"])
+        self.save_json(utterances, save_path + "/utterances.json")
+        return utterances
 
+    def stream_utterances(self, audio: SharedAudio, save_path: str, diarization) -> list[dict]:
+        """Steps 1, 3 and 4 in one pass: each transcribed window is attributed and merged right away.
 
-        print("[Pipeline] Step 4: Merging phrases...")
-        utterances = PhraseMerger.merge_segments(asr_result["segments"])
-        with open(self.save_path + "/utterances.json", "w", encoding="utf-8") as f:
-            json.dump(utterances, f, ensure_ascii=False, indent=2)
+        Diarization has to be complete first, since a segment's speaker depends on all turns around it.
+        """
+        print("[Pipeline] Steps 1, 3, 4: Streaming transcription, speaker labels and phrases...")
+        segments = []
+
+        def collect(stream):
+            for segment in stream:
+                segments.append(segment)
+                yield segment
+
+        stream = self.asr.transcribe_stream(audio, window=self.stream_window, overlap=self.stream_overlap)
+        utterances = []
+        for utterance in PhraseMerger.iter_merge(iter_attributed(collect(stream), annotation_turns(diarization))):
+            utterances.append(utterance)
+            if self.on_utterance:
+                self.on_utterance(utterance)
+
+        asr = {"text": "".join(segment["text"] for segment in segments), "segments": segments}
+        self.save_json(asr, save_path + "/asr_output.json")
+        self.save_json(utterances, save_path + "/utterances.json")
+        return utterances
 
+    def segment_topics(self, utterances: list[dict], save_path: str) -> list[dict]:
         print("[Pipeline] Step 5: Topic segmentation...")
         phases = self.topic_segmenter.segment(utterances)
-        with open(self.save_path + "/phases.json", "w", encoding="utf-8") as f:
-            json.dump(phases, f, ensure_ascii=False, indent=2)
+        self.save_json(phases, save_path + "/phases.json")
+        return phases
 
+    def summarize(self, utterances: list[dict], save_path: str) -> str:
         print("[Pipeline] Step 6: Generating summary...")
         summary = self.summarizer.summarize(utterances)
-        with open(self.save_path + "/summary.txt", "w", encoding="utf-8") as f:
-            json.dump(summary.strip(), f, ensure_ascii=False, indent=2)
+        self.save_json(summary.strip(), save_path + "/summary.txt")
+        return summary
 
+    def detect_intents(self, utterances: list[dict], save_path: str) -> list[dict]:
         print("[Pipeline] Step 7: Detecting intents...")
         intents = self.intent_detector.detect(utterances)
-        with open(self.save_path + "/intents.json", "w", encoding="utf-8") as f:
-            json.dump(intents, f, ensure_ascii=False, indent=2)
+        self.save_json(intents, save_path + "/intents.json")
+        return intents
+
+    def extract_speaker_info(self, utterances: list[dict], save_path: str) -> dict:
         print("[Pipeline] Step 8: Extracting speaker information...")
         speaker_info = self.speaker_info_extractor.extract(utterances)
-        with open(self.save_path + "/speaker_info.json", "w", encoding="utf-8") as f:
-            json.dump(speaker_info, f, ensure_ascii=False, indent=2)
+        self.save_json(speaker_info, save_path + "/speaker_info.json")
+        return speaker_info
 
+    def assemble(self, attribution: dict, utterances: list[dict], phases: list[dict], summary: str,
+                 intents: list[dict], speaker_info: dict, save_path: str) -> dict:
         print("[Pipeline] Step 9: Final Output Assembly...")
-        final_output = self.assemble_final_output(
-            summary_path=self.save_path + "/summary.txt",
-            phases_path=self.save_path + "/phases.json",
-            asr_path=self.save_path + "/asr_output.json",
-            speaker_info_path=self.save_path + "/speaker_info.json",
-            intents_path=self.save_path + "/intents.json",
-            utterences_path=self.save_path + "/utterances.json"
+        final_output = assemble_final_output(
+            summary=summary,
+            phases=phases,
+            text=attribution["text"],
+            speaker_info=speaker_info,
+            intents=intents,
+            utterances=utterances
         )
 
-        with open(self.save_path + "/final_output.json", "w") as f:
-            json.dump(final_output, f, indent=2, ensure_ascii=False)
+        path = os.path.join(save_path, self.final_output_name)
+        if self.output_format == "ndjson":
+            write_ndjson(final_output, path)
+        else:
+            write_json(final_output, path)
         return final_output
-
-    def assemble_final_output(
-        self,
-        summary_path: str,
-        phases_path: str,
-        asr_path: str,
-        speaker_info_path: str,
-        intents_path: str,
-        utterences_path: str
-    ) -> dict:
-        with open(summary_path, "r", encoding="utf-8") as f:
-            summary = json.load(f) if summary_path.endswith(".json") else f.read().strip()
-
-        with open(phases_path, "r", encoding="utf-8") as f:
-            phases = json.load(f)
-
-        with open(utterences_path, "r", encoding="utf-8") as f:
-            segments = json.load(f)
-
-        with open(asr_path, "r", encoding="utf-8") as f:
-            full_text = json.load(f)["text"]
-
-        with open(speaker_info_path, "r", encoding="utf-8") as f:
-            raw_info = json.load(f)
-            if isinstance(raw_info, dict) and "raw_response" in raw_info:
-                raw = raw_info["raw_response"].strip("```json\n").strip("```")
-                speaker_info = json.loads(raw)
-            else:
-                speaker_info = raw_info
-
-        with open(intents_path, "r", encoding="utf-8") as f:
-            intent_data = json.load(f)
-            intent_map = {item["id"]: item["intent"] for item in intent_data}
-
-        utterances = []
-        for idx, seg in enumerate(segments):
-            uid = seg.get("id", idx)
-            utterances.append({
-                "id": uid,
-                "start": seg["start"],
-                "end": seg["end"],
-                "text": seg["text"],
-                "speaker": seg.get("speaker", "unknown"),
-                "segment_ids": [uid],
-                "intent": intent_map.get(uid, "unknown")
-            })
-
-        result = {
-            "summary": summary,
-            "conversation_phases": phases,
-            "text": full_text,
-            "speakers_info": speaker_info,
-            "utterances": utterances
-        }
-        return result
@@ -0,0 +1,107 @@
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class Stage:
+    """A pipeline step. `fn` receives the results of `deps` as keyword arguments.
+
+    `artifact` is the file (relative to the save path) the step writes, `load` reads it back
+    and `config` holds everything besides the dependencies that determines the result.
+    """
+
+    def __init__(self, name: str, fn: Callable[..., Any], deps: Sequence[str] = (), kind: str = "llm",
+                 artifact: Optional[str] = None, load: Optional[Callable[[str], Any]] = None,
+                 config: Optional[dict] = None):
+        if kind not in ("model", "llm"):
+            raise ValueError(f"Unknown stage kind: {kind}")
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.kind = kind
+        self.artifact = artifact
+        self.load = load
+        self.config = config or {}
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, deps={list(self.deps)}, kind={self.kind!r})"
+
+
+def topological_order(stages: List[Stage]) -> List[Stage]:
+    by_name = {stage.name: stage for stage in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("Duplicate stage names")
+    for stage in stages:
+        missing = [d for d in stage.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown stages {missing}")
+
+    order, state = [], {}
+
+    def visit(stage: Stage):
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            raise ValueError(f"Dependency cycle through stage {stage.name!r}")
+        state[stage.name] = "visiting"
+        for dep in stage.deps:
+            visit(by_name[dep])
+        state[stage.name] = "done"
+        order.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return order
+
+
+class StageScheduler:
+    """Runs a stage graph, starting every stage as soon as its dependencies have finished.
+
+    Model stages (Whisper, pyannote) and LLM stages get separate thread pools so that a
+    long transcription never starves the LLM calls. Both engines release the GIL while they
+    work, so threads give real overlap without reloading the models in another process.
+    """
+
+    def __init__(self, model_workers: int = 2, llm_workers: int = 4, parallel: bool = True):
+        self.model_workers = model_workers
+        self.llm_workers = llm_workers
+        self.parallel = parallel
+
+    def run(self, stages: List[Stage]) -> Dict[str, Any]:
+        order = topological_order(stages)
+        if not self.parallel:
+            results = {}
+            for stage in order:
+                results[stage.name] = stage.fn(**{d: results[d] for d in stage.deps})
+            return results
+        return self._run_parallel(order)
+
+    def _run_parallel(self, order: List[Stage]) -> Dict[str, Any]:
+        results = {}
+        pending = list(order)
+        running = {}
+        pools = {
+            "model": ThreadPoolExecutor(max_workers=self.model_workers, thread_name_prefix="model-stage"),
+            "llm": ThreadPoolExecutor(max_workers=self.llm_workers, thread_name_prefix="llm-stage"),
+        }
+        try:
+            while pending or running:
+                for stage in [s for s in pending if all(d in results for d in s.deps)]:
+                    pending.remove(stage)
+                    kwargs = {d: results[d] for d in stage.deps}
+                    # Run in a copy of the caller's context so context variables (e.g. telemetry) carry over.
+                    context = contextvars.copy_context()
+                    running[pools[stage.kind].submit(context.run, stage.fn, **kwargs)] = stage
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    results[stage.name] = future.result()
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+        return results
@@ -0,0 +1,233 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+
+from src.output import load_final_output
+from src.pipeline import Pipeline
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, audio_path: str, output_root: str, force: Iterable[str] = (), job_id: str = None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.audio_path = audio_path
+        self.save_path = os.path.join(output_root, self.id)
+        self.force = list(force)
+        self.status = "queued"
+        self.error = None
+        self.stages: Dict[str, str] = {}
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.lock = threading.Lock()
+
+    def set_stage(self, name: str, status: str):
+        with self.lock:
+            self.stages[name] = status
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            stages = dict(self.stages)
+        done = sum(status == "done" for status in stages.values())
+        return {
+            "id": self.id,
+            "audio_path": self.audio_path,
+            "save_path": self.save_path,
+            "status": self.status,
+            "error": self.error,
+            "stages": stages,
+            "progress": done / len(stages) if stages else 0.0,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class PipelineService:
+    """Runs submitted recordings on one resident Pipeline, so models load once per process.
+
+    At most `max_queue` jobs wait; beyond that `submit` raises QueueFull. `workers` jobs run at
+    a time and share the models like `Pipeline.run_many` meetings do. Each job writes the usual
+    `Pipeline.run` layout to `<output_root>/<job id>/`.
+    """
+
+    def __init__(self, pipeline: Pipeline, output_root: str = "outputs/jobs", max_queue: int = 16,
+                 workers: int = 1, max_finished: int = 1000):
+        self.pipeline = pipeline
+        self.output_root = output_root
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.jobs: Dict[str, Job] = {}
+        self.lock = threading.Lock()
+        self.max_finished = max_finished
+        self.threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True) for i in range(workers)
+        ]
+
+    def start(self, preload: bool = True):
+        if preload:
+            print("[Service] Loading models...")
+            self.pipeline.asr.model
+            self.pipeline.diarizer.pipeline
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, audio_path: str, force: Iterable[str] = (), job_id: str = None) -> Job:
+        if not os.path.isfile(audio_path):
+            raise FileNotFoundError(audio_path)
+        if job_id is not None and (not job_id or os.path.basename(job_id) != job_id or job_id.startswith(".")):
+            raise ValueError(f"Invalid job id {job_id!r}")
+        job = Job(audio_path, self.output_root, force=force, job_id=job_id)
+        with self.lock:
+            if job.id in self.jobs and self.jobs[job.id].status in ("queued", "running"):
+                raise ValueError(f"Job {job.id} is already queued or running")
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFull(f"{self.queue.maxsize} jobs already waiting")
+            self.jobs[job.id] = job
+        print(f"[Service] Queued job {job.id}: {audio_path}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        with self.lock:
+            return list(self.jobs.values())
+
+    def stats(self) -> dict:
+        jobs = self.list_jobs()
+        return {
+            "queued": sum(job.status == "queued" for job in jobs),
+            "running": sum(job.status == "running" for job in jobs),
+            "max_queue": self.queue.maxsize,
+            "workers": len(self.threads),
+        }
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            job.status, job.started = "running", time.time()
+            try:
+                self.pipeline.run(job.audio_path, force=job.force, save_path=job.save_path, on_stage=job.set_stage)
+                job.status = "done"
+            except Exception as e:
+                print(f"[Service] Job {job.id} failed: {e!r}")
+                job.status, job.error = "failed", repr(e)
+            job.finished = time.time()
+            self.queue.task_done()
+            self._forget_old_jobs()
+
+    def _forget_old_jobs(self):
+        with self.lock:
+            finished = [job for job in self.jobs.values() if job.finished is not None]
+            for job in sorted(finished, key=lambda j: j.finished)[:max(0, len(finished) - self.max_finished)]:
+                del self.jobs[job.id]
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """JSON API:
+
+        POST /jobs                 {"audio_path": ..., "force": [...], "id": optional} -> 202 job
+        GET  /jobs                 all known jobs
+        GET  /jobs/<id>            status and per-stage progress
+        GET  /jobs/<id>/result     the final output, once the job is done
+        GET  /jobs/<id>/files/<f>  any file of the job's output directory (utterances.json, ...)
+        GET  /health               queue and worker counts
+    """
+
+    service: PipelineService = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload, headers: dict = None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_file(self, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/gzip" if path.endswith(".gz") else "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._send_json(404, {"error": "not found"})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("body must be a JSON object")
+            audio_path, force, job_id = body["audio_path"], body.get("force", []), body.get("id")
+            if not isinstance(audio_path, str):
+                raise ValueError("audio_path must be a string")
+            if not isinstance(force, list) or not all(isinstance(stage, str) for stage in force):
+                raise ValueError("force must be a list of stage names")
+            if job_id is not None and not isinstance(job_id, str):
+                raise ValueError("id must be a string")
+            job = self.service.submit(audio_path, force=force, job_id=job_id)
+        except QueueFull as e:
+            return self._send_json(503, {"error": str(e)}, headers={"Retry-After": "30"})
+        except FileNotFoundError as e:
+            return self._send_json(400, {"error": f"audio file not found: {e}"})
+        except (KeyError, ValueError) as e:
+            return self._send_json(400, {"error": f"bad request: {e!r}"})
+        self._send_json(202, job.to_dict(), headers={"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if parts == ["health"]:
+            return self._send_json(200, {"status": "ok", **self.service.stats()})
+        if parts == ["jobs"]:
+            return self._send_json(200, [job.to_dict() for job in self.service.list_jobs()])
+        if len(parts) < 2 or parts[0] != "jobs":
+            return self._send_json(404, {"error": "not found"})
+
+        job = self.service.get(parts[1])
+        if job is None:
+            return self._send_json(404, {"error": "unknown job"})
+        if len(parts) == 2:
+            return self._send_json(200, job.to_dict())
+        if job.status != "done":
+            return self._send_json(409, {"error": f"job is {job.status}"})
+        if parts[2:] == ["result"]:
+            path = os.path.join(job.save_path, self.service.pipeline.final_output_name)
+            return self._send_json(200, load_final_output(path))
+        if len(parts) == 4 and parts[2] == "files":
+            # Only plain names inside the job's own directory.
+            name = os.path.basename(parts[3])
+            path = os.path.join(job.save_path, name)
+            if name == parts[3] and os.path.isfile(path):
+                return self._send_file(path)
+        return self._send_json(404, {"error": "not found"})
+
+
+def serve(service: PipelineService, host: str = "127.0.0.1", port: int = 8000, preload: bool = True):
+    handler = type("Handler", (ServiceHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    service.start(preload=preload)
+    print(f"[Service] Listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,53 @@
+import heapq
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+Turn = Tuple[float, float, str]
+
+
+def annotation_turns(diarization) -> List[Turn]:
+    return [(turn.start, turn.end, speaker) for turn, _, speaker in diarization.itertracks(yield_label=True)]
+
+
+def iter_attributed(segments: Iterable[Dict], turns: Iterable[Turn], unknown: str = "unknown") -> Iterator[Dict]:
+    """Yield segments with their "speaker" set to the turn of maximum overlap.
+
+    Segments must arrive sorted by start time (Whisper output always is); turns can be in
+    any order. Each turn enters and leaves the active set once, so the whole sweep costs
+    O((S + T) log T) plus the overlap checks against concurrently active turns.
+    """
+    turns = sorted(turns, key=lambda t: t[0])
+    active = []  # min-heap of (end, index) for turns that started before the current segment ends
+    next_turn = 0
+    last_start = float("-inf")
+
+    for segment in segments:
+        start, end = segment["start"], segment["end"]
+        if start < last_start:
+            raise ValueError("Segments must be sorted by start time.")
+        last_start = start
+
+        # `<=` so a zero-length segment sees a turn starting exactly at it.
+        while next_turn < len(turns) and turns[next_turn][0] <= end:
+            heapq.heappush(active, (turns[next_turn][1], next_turn))
+            next_turn += 1
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+
+        best = None
+        for turn_end, idx in active:
+            turn_start = turns[idx][0]
+            overlap = min(end, turn_end) - max(start, turn_start)
+            # Zero-length segments have no overlap to compare, so fall back to containment.
+            if overlap > 0 or (start == end and turn_start <= start < turn_end):
+                if best is None or (overlap, -idx) > best:
+                    best = (overlap, -idx)
+
+        segment["speaker"] = turns[-best[1]][2] if best else unknown
+        yield segment
+
+
+def attribute_speakers(segments: List[Dict], turns: Iterable[Turn], unknown: str = "unknown") -> List[Dict]:
+    order = sorted(range(len(segments)), key=lambda i: segments[i]["start"])
+    for _ in iter_attributed((segments[i] for i in order), turns, unknown=unknown):
+        pass
+    return segments
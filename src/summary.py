@@ -1,13 +1,85 @@
+from typing import List, Optional
 from src.llm_client import LLMClient
 
 
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text; close enough for budgeting.
+    return len(text) // 4 + 1
+
+
+def pack_chunks(lines: List[str], max_tokens: int) -> List[List[str]]:
+    chunks, current, current_tokens = [], [], 0
+    for line in lines:
+        tokens = estimate_tokens(line)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
 class MeetingSummarizer:
-    def __init__(self, llm_client: LLMClient, prompt_path: str = "src/prompts/meeting_summary.txt"):
+    def __init__(self, llm_client: LLMClient, prompt_path: str = "src/prompts/meeting_summary.txt",
+                 chunk_prompt_path: str = "src/prompts/meeting_summary_chunk.txt",
+                 reduce_prompt_path: str = "src/prompts/meeting_summary_reduce.txt",
+                 chunk_tokens: int = 8000, max_concurrency: Optional[int] = None):
         self.llm = llm_client
+        self.chunk_tokens = chunk_tokens
+        self.max_concurrency = max_concurrency
         with open(prompt_path, "r", encoding="utf-8") as f:
             self.prompt = f.read()
+        with open(chunk_prompt_path, "r", encoding="utf-8") as f:
+            self.chunk_prompt = f.read()
+        with open(reduce_prompt_path, "r", encoding="utf-8") as f:
+            self.reduce_prompt = f.read()
 
 
     def summarize(self, utterances: list[dict]) -> str:
-        input_text = "\n".join(f"{utt['speaker']}: {utt['text'].strip()}" for utt in utterances)
-        return self.llm.call(self.prompt, input_text)
+        lines = [f"{utt['speaker']}: {utt['text'].strip()}" for utt in utterances]
+        input_text = "\n".join(lines)
+        if estimate_tokens(input_text) <= self.chunk_tokens:
+            return self.llm.call(self.prompt, input_text)
+        return self.summarize_map_reduce(lines)
+
+    def summarize_map_reduce(self, lines: List[str]) -> str:
+        chunks = pack_chunks(lines, self.chunk_tokens)
+        print(f"[MeetingSummarizer] Summarizing {len(chunks)} chunks")
+        partials = self.llm.call_many([(self.chunk_prompt, "\n".join(chunk)) for chunk in chunks],
+                                      max_concurrency=self.max_concurrency)
+
+        # Reduce in rounds until all partial summaries fit into a single request.
+        while True:
+            parts = self.label_parts(partials)
+            groups = pack_chunks(parts, self.chunk_tokens)
+            if len(groups) == 1:
+                return self.llm.call(self.reduce_prompt, "\n\n".join(parts))
+            if len(groups) < len(parts):
+                partials = self.llm.call_many([(self.reduce_prompt, "\n\n".join(group)) for group in groups],
+                                              max_concurrency=self.max_concurrency)
+                continue
+            # No two partial summaries fit together: condense each one on its own.
+            condensed = self.llm.call_many([(self.reduce_prompt, part) for part in parts],
+                                           max_concurrency=self.max_concurrency)
+            if sum(map(estimate_tokens, condensed)) >= sum(map(estimate_tokens, partials)):
+                raise RuntimeError(f"Partial summaries no longer shrink and do not fit into chunk_tokens="
+                                   f"{self.chunk_tokens} together; increase chunk_tokens")
+            partials = condensed
+
+    def label_parts(self, partials: List[str]) -> List[str]:
+        """Number the partial summaries for the reduce prompt, splitting any that alone exceed the budget."""
+        budget = self.chunk_tokens - estimate_tokens("Part 0000:\n")
+        pieces = []
+        for partial in partials:
+            partial = partial.strip()
+            if estimate_tokens(partial) <= budget:
+                pieces.append(partial)
+                continue
+            for chunk in pack_chunks(partial.splitlines(), budget):
+                piece = "\n".join(chunk)
+                if estimate_tokens(piece) > budget:
+                    raise ValueError(f"A line of a partial summary exceeds chunk_tokens={self.chunk_tokens}")
+                pieces.append(piece)
+        return [f"Part {i + 1}:\n{piece}" for i, piece in enumerate(pieces)]
@@ -0,0 +1,184 @@
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from src.scheduler import Stage
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_current_telemetry = contextvars.ContextVar("telemetry", default=None)
+_current_stage = contextvars.ContextVar("stage", default=None)
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size right now: /proc on Linux, psutil elsewhere if it is installed."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+class RSSSampler:
+    """Samples the process RSS on a background thread while a stage runs, to find its peak."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.start_mb = self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak_mb = rss if self.peak_mb is None else max(self.peak_mb, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        if self.start_mb is not None:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._sample()
+
+    def metrics(self) -> dict:
+        if self.start_mb is None:
+            return {"rss_start_mb": None, "peak_rss_mb": None, "peak_rss_delta_mb": None}
+        return {"rss_start_mb": self.start_mb, "peak_rss_mb": self.peak_mb,
+                "peak_rss_delta_mb": self.peak_mb - self.start_mb}
+
+
+def record_llm_call(model: str, latency: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+                    cached: bool = False):
+    """Attach an LLM call to the telemetry of the run and stage it was made from, if any."""
+    telemetry = _current_telemetry.get()
+    if telemetry is not None:
+        telemetry.add_llm_call({
+            "stage": _current_stage.get(),
+            "model": model,
+            "latency_seconds": latency,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached": cached,
+        })
+
+
+class Telemetry:
+    """Per-run metrics: wall/CPU time and peak RSS per stage, plus latency and token usage per LLM call.
+
+    `cpu_seconds` is the CPU time of the thread running the stage; work the stage hands to other
+    threads (e.g. concurrent LLM calls) only shows up in `process_cpu_seconds`, which also includes
+    whatever other stages were doing at the same time. RSS is sampled while each stage runs:
+    `peak_rss_mb` is the highest value seen and `peak_rss_delta_mb` its growth over `rss_start_mb`.
+    RSS is per process, so stages running concurrently see each other's allocations. The run-level
+    `peak_rss_mb` is the process high-water mark.
+    """
+
+    def __init__(self, exporter: Optional[Callable[[dict], None]] = None):
+        self.exporter = exporter
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.llm_calls = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def activate(self):
+        token = _current_telemetry.set(self)
+        try:
+            yield self
+        finally:
+            _current_telemetry.reset(token)
+
+    @contextmanager
+    def stage(self, name: str):
+        token = _current_stage.set(name)
+        wall, cpu, process_cpu = time.perf_counter(), time.thread_time(), time.process_time()
+        sampler = RSSSampler()
+        try:
+            with sampler:
+                yield
+        finally:
+            _current_stage.reset(token)
+            with self.lock:
+                self.stages[name] = {
+                    "wall_seconds": time.perf_counter() - wall,
+                    "cpu_seconds": time.thread_time() - cpu,
+                    "process_cpu_seconds": time.process_time() - process_cpu,
+                    **sampler.metrics(),
+                }
+
+    def wrap(self, stage: Stage) -> Stage:
+        def run(**deps):
+            with self.stage(stage.name):
+                return stage.fn(**deps)
+
+        return Stage(stage.name, run, deps=stage.deps, kind=stage.kind)
+
+    def add_llm_call(self, call: dict):
+        with self.lock:
+            self.llm_calls.append(call)
+
+    @staticmethod
+    def summarize_calls(calls: list) -> dict:
+        return {
+            "calls": len(calls),
+            "cached_calls": sum(c["cached"] for c in calls),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "completion_tokens": sum(c["completion_tokens"] for c in calls),
+            "latency_seconds": sum(c["latency_seconds"] for c in calls),
+        }
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            stages = {name: dict(metrics) for name, metrics in self.stages.items()}
+            calls = list(self.llm_calls)
+        for name, metrics in stages.items():
+            metrics["llm"] = self.summarize_calls([c for c in calls if c["stage"] == name])
+        return {
+            "wall_seconds": time.perf_counter() - self.started,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+            "llm": self.summarize_calls(calls),
+            "llm_calls": calls,
+        }
+
+    def save(self, path: str) -> dict:
+        metrics = self.to_dict()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, ensure_ascii=False, indent=2)
+        if self.exporter:
+            try:
+                self.exporter(metrics)
+            except Exception as e:
+                print(f"[Telemetry] Metrics exporter failed: {e!r}")
+        return metrics
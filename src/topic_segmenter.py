@@ -1,9 +1,19 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from src.llm_client import LLMClient
 
 class TopicSegmenter:
-    def __init__(self, llm_client: LLMClient, prompt_path: str = "src/prompts/phases_segmentation.txt"):
+    def __init__(self, llm_client: LLMClient, prompt_path: str = "src/prompts/phases_segmentation.txt",
+                 window_size: Optional[int] = None, window_overlap: Optional[int] = None,
+                 max_concurrency: Optional[int] = None):
+        if window_overlap is None:
+            # 20 phrases of context, but never more than a quarter of a small window.
+            window_overlap = min(20, window_size // 4) if window_size else 20
+        if window_size is not None and not 0 <= window_overlap < window_size:
+            raise ValueError("window_overlap must be smaller than window_size")
         self.llm = llm_client
+        self.window_size = window_size
+        self.window_overlap = window_overlap
+        self.max_concurrency = max_concurrency
         with open(prompt_path, "r", encoding="utf-8") as f:
             self.prompt = f.read()
 
@@ -17,9 +27,13 @@ class TopicSegmenter:
         return "\n".join(lines)
 
     def segment(self, phrases: List[Dict]) -> List[Dict]:
+        if self.window_size and len(phrases) > self.window_size:
+            return self.segment_windowed(phrases)
         input_text = self.prepare_input(phrases)
         raw_output = self.llm.call(self.prompt, input_text)
+        return self.parse_output(raw_output)
 
+    def parse_output(self, raw_output: str) -> List[Dict]:
         segments = []
         for line in raw_output.strip().splitlines():
             if "|" not in line:
@@ -38,3 +52,39 @@ class TopicSegmenter:
                 continue
 
         return segments
+
+    def segment_windowed(self, phrases: List[Dict]) -> List[Dict]:
+        """Segment overlapping windows of phrases concurrently and stitch them into one partition.
+
+        Each window is trusted for the phrases closest to its own centre: the overlap between two
+        windows is split at its midpoint. Phrases no segment covers take the topic of the phrase
+        before them, and consecutive phrases with the same topic are merged into one segment.
+        """
+        step = self.window_size - self.window_overlap
+        starts = list(range(0, max(1, len(phrases) - self.window_overlap), step))
+        windows = [phrases[s:s + self.window_size] for s in starts]
+        print(f"[TopicSegmenter] Segmenting {len(windows)} windows")
+        outputs = self.llm.call_many([(self.prompt, self.prepare_input(w)) for w in windows],
+                                     max_concurrency=self.max_concurrency)
+
+        labels = [None] * len(phrases)
+        for w, (start, output) in enumerate(zip(starts, outputs)):
+            owned_from = start + self.window_overlap // 2 if w > 0 else 0
+            owned_to = starts[w + 1] + self.window_overlap // 2 if w + 1 < len(starts) else len(phrases)
+            position = {phrases[i].get("id"): i for i in range(start, min(start + self.window_size, len(phrases)))}
+            for seg in self.parse_output(output):
+                if seg["start_id"] not in position or seg["end_id"] not in position:
+                    continue
+                for i in range(max(position[seg["start_id"]], owned_from),
+                               min(position[seg["end_id"]], owned_to - 1) + 1):
+                    labels[i] = seg["topic"]
+
+        first_known = next((label for label in labels if label is not None), "other")
+        segments = []
+        for i, phrase in enumerate(phrases):
+            label = labels[i] if labels[i] is not None else (segments[-1]["topic"] if segments else first_known)
+            if segments and segments[-1]["topic"] == label:
+                segments[-1]["end_id"] = phrase.get("id")
+            else:
+                segments.append({"topic": label, "start_id": phrase.get("id"), "end_id": phrase.get("id")})
+        return segments
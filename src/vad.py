@@ -0,0 +1,79 @@
+from typing import List, Tuple
+
+import numpy as np
+
+Region = Tuple[float, float]
+
+
+def merge_regions(regions: List[Region], pad: float = 0.0, min_gap: float = 0.0,
+                  duration: float = None) -> List[Region]:
+    """Pad regions on both sides, clip them to [0, duration] and merge those less than `min_gap` apart."""
+    merged = []
+    for start, end in sorted(regions):
+        start, end = max(0.0, start - pad), end + pad
+        if duration is not None:
+            end = min(end, duration)
+        if end <= start:
+            continue
+        if merged and start - merged[-1][1] < min_gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def energy_speech_regions(samples: np.ndarray, sr: int, frame: float = 0.03, margin_db: float = 12.0,
+                          floor_db: float = -55.0, min_speech: float = 0.2, min_silence: float = 0.5,
+                          pad: float = 0.2) -> List[Region]:
+    """Speech regions from frame energy: a cheap CPU voice-activity detector with no model to load.
+
+    A frame is speech when its RMS level is `margin_db` above the noise floor (the 10th percentile
+    of frame levels) and above `floor_db` dBFS. The threshold never exceeds `margin_db` below the
+    loud frames (99th percentile), so a recording that is speech almost throughout stays speech.
+    Gaps shorter than `min_silence` are bridged, regions shorter than `min_speech` dropped, and the
+    rest padded by `pad` seconds.
+    """
+    hop = max(1, int(frame * sr))
+    n_frames = len(samples) // hop
+    if n_frames == 0:
+        return []
+    frames = np.asarray(samples[:n_frames * hop], dtype=np.float32).reshape(n_frames, hop)
+    level = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    noise, loud = np.percentile(level, [10, 99])
+    threshold = max(min(noise + margin_db, loud - margin_db), floor_db)
+    active = np.concatenate(([False], level > threshold, [False]))
+
+    edges = np.flatnonzero(active[1:] != active[:-1])
+    regions = [(float(s * hop / sr), float(e * hop / sr)) for s, e in zip(edges[::2], edges[1::2])]
+    regions = merge_regions(regions, min_gap=min_silence)
+    regions = [(s, e) for s, e in regions if e - s >= min_speech]
+    return merge_regions(regions, pad=pad, duration=len(samples) / sr)
+
+
+def annotation_speech_regions(annotation, offset: float = 0.0, pad: float = 0.2, min_gap: float = 0.5,
+                              duration: float = None) -> List[Region]:
+    """Speech regions from a diarization, shifted by `offset` back onto the recording's timeline."""
+    regions = [(segment.start + offset, segment.end + offset) for segment in annotation.get_timeline().support()]
+    return merge_regions(regions, pad=pad, min_gap=min_gap, duration=duration)
+
+
+class SpeechMap:
+    """Speech regions cut out of a recording and concatenated, with the mapping back to original time."""
+
+    def __init__(self, samples: np.ndarray, regions: List[Region], sr: int):
+        bounds = [(int(round(s * sr)), min(len(samples), int(round(e * sr)))) for s, e in regions]
+        bounds = [(a, b) for a, b in bounds if b > a]
+        self.samples = (np.concatenate([samples[a:b] for a, b in bounds]) if bounds
+                        else np.zeros(0, dtype=np.float32))
+        lengths = np.array([b - a for a, b in bounds], dtype=np.int64)
+        self.orig_start = np.array([a for a, _ in bounds], dtype=np.float64) / sr
+        self.orig_end = np.array([b for _, b in bounds], dtype=np.float64) / sr
+        self.concat_start = (np.cumsum(lengths) - lengths) / sr
+        self.speech_seconds = float(lengths.sum()) / sr
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """Original time of a position in `samples`; a segment end on a cut belongs to the region before it."""
+        if not len(self.concat_start):
+            return t
+        i = max(0, int(np.searchsorted(self.concat_start, t, side="left" if is_end else "right")) - 1)
+        return float(min(self.orig_start[i] + (t - self.concat_start[i]), self.orig_end[i]))